@@ -4,15 +4,138 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import threading
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 from camera_capture import CameraCapture
 from drowsiness_detector import DrowsinessDetector
 from preferences import PreferencesManager
 from break_overlay import BreakOverlay
 from task_database import TaskDatabase
-from task_learner import TaskLearner
+from task_learner import INDEX_KEYS, WEIGHT_KEYS, TaskLearner, warm_up_kernels
 from input_monitor import InputMonitor
 
+# Wall-clock format for break log lines
+_STRFMT = '%H:%M:%S'
+
+@dataclass(frozen=True, slots=True)
+class WarningInfo:
+    """Static alert text shown for an elevated index."""
+    title: str
+    problem: str
+    immediate_fix: str
+    long_term_risk: str
+    score: str
+
+_INDEX_WARNINGS: Dict[str, WarningInfo] = {
+    'drowsiness': WarningInfo(
+        title='😴 Drowsiness Detected',
+        problem='Your eyes are showing significant closure, indicating drowsiness.',
+        immediate_fix='• Look away from the screen\n• Blink deliberately several times\n• Take 5 deep breaths\n• Stand up and stretch',
+        long_term_risk='Continued work while drowsy can lead to:\n• Reduced productivity and increased errors\n• Eye strain and headaches\n• Increased accident risk\n• Chronic fatigue if sleep-deprived',
+        score='High drowsiness'
+    ),
+    'slouching': WarningInfo(
+        title='🪑 Poor Posture Detected',
+        problem='Your shoulders are significantly deviated from proper alignment.',
+        immediate_fix='• Sit up straight with shoulders back\n• Adjust your chair height\n• Position screen at eye level\n• Use lumbar support',
+        long_term_risk='Prolonged poor posture can cause:\n• Chronic back and neck pain\n• Spinal misalignment and disc problems\n• Reduced lung capacity\n• Permanent postural changes',
+        score='Severe slouching'
+    ),
+    'attention': WarningInfo(
+        title='🎯 Attention Drift Detected',
+        problem='You\'re frequently looking away from your work area.',
+        immediate_fix='• Refocus on your task\n• Remove distractions from view\n• Take a 2-minute mindfulness break\n• Set a smaller, achievable goal',
+        long_term_risk='Consistent attention problems can lead to:\n• Decreased work quality and productivity\n• Increased time to complete tasks\n• Higher stress from unfinished work\n• Difficulty maintaining focus over time',
+        score='High distraction'
+    ),
+    'yawn_score': WarningInfo(
+        title='🥱 Frequent Yawning Detected',
+        problem='You\'re yawning repeatedly, indicating significant fatigue.',
+        immediate_fix='• Take a 5-10 minute break\n• Get some fresh air or cold water\n• Do light physical activity\n• Consider a power nap (10-20 min)',
+        long_term_risk='Ignoring fatigue signals can result in:\n• Accumulated sleep debt\n• Weakened immune system\n• Impaired cognitive function\n• Increased risk of burnout',
+        score='High fatigue'
+    ),
+    # Removed warnings for head_nodding, eye_smoothness, blink_variance
+}
+
+_DEFAULT_WARNING = WarningInfo(
+    title='⚠️ Tiredness Alert',
+    problem='Elevated tiredness indicator detected.',
+    immediate_fix='• Take a short break\n• Rest and recharge',
+    long_term_risk='Continued strain may affect health and productivity.',
+    score='Elevated'
+)
+
+# Alert message templates (filled with str.format; info is a WarningInfo)
+_INDEX_WARNING_TEMPLATE = (
+    "{info.title}\n"
+    "Current Level: {value:.2f} / 1.00 ({info.score})\n\n"
+    "📊 WHAT'S HAPPENING:\n{info.problem}\n\n"
+    "✅ IMMEDIATE ACTIONS:\n{info.immediate_fix}\n\n"
+    "⚠️ LONG-TERM RISKS:\n{info.long_term_risk}\n\n"
+    "Note: This is an informational warning. Work timers trigger separately based on overall tiredness."
+)
+
+_BREAK_TEMPLATE = (
+    "Break needed! ({reason})\n\n"
+    "{info.title}\n\n"
+    "📊 WHAT'S HAPPENING:\n{info.problem}\n\n"
+    "✅ IMMEDIATE ACTIONS:\n{info.immediate_fix}\n\n"
+    "⚠️ LONG-TERM RISKS:\n{info.long_term_risk}\n\n"
+    "Break duration: {duration} seconds. Use this time to test the suggested actions!"
+)
+
+_REMINDER_MESSAGES: Dict[str, str] = {
+    'drowsiness': "⚠️ Drowsiness Alert\n\nYou're showing signs of drowsiness. Consider taking a short break to rest your eyes and refresh.",
+    'slouching': "⚠️ Posture Alert\n\nYou're slouching too much! Poor posture can lead to back problems in the long run. Please sit up straight.",
+    'attention': "⚠️ Attention Alert\n\nYour attention seems to be drifting. Consider refocusing or taking a brief break.",
+    'yawn_score': "⚠️ Fatigue Alert\n\nYou're yawning frequently, indicating fatigue. A short break might help you recharge."
+}
+
+_DEFAULT_REMINDER = "⚠️ Tiredness Alert\n\nYou're showing signs of tiredness. Consider taking a break."
+
+class NonBlockingAlert(tk.Toplevel):
+    """
+    Non-modal replacement for messagebox.showinfo/showwarning.
+    
+    Unlike messagebox, this does not grab input or wait for the window to close,
+    so the Tk main loop (display updates, queued after() callbacks) keeps running
+    while the alert is visible.
+    """
+    
+    def __init__(self, root, title: str, message: str, on_ok: Optional[Callable[[], None]] = None):
+        """
+        Create and show the alert.
+        
+        Args:
+            root: Parent tkinter window
+            title: Window title
+            message: Alert text
+            on_ok: Called once when the alert is dismissed (OK button or window close)
+        """
+        super().__init__(root)
+        self.title(title)
+        self.transient(root)
+        self.resizable(False, False)
+        self._on_ok = on_ok
+        
+        frame = ttk.Frame(self, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text=message, justify=tk.LEFT, wraplength=480).pack(pady=(0, 10))
+        ok_button = ttk.Button(frame, text="OK", command=self._dismiss)
+        ok_button.pack()
+        ok_button.focus_set()
+        
+        self.bind('<Return>', lambda e: self._dismiss())
+        self.protocol("WM_DELETE_WINDOW", self._dismiss)
+    
+    def _dismiss(self):
+        """Close the alert and run the callback (only once)."""
+        callback, self._on_ok = self._on_ok, None
+        self.destroy()
+        if callback:
+            callback()
+
 class StudySleepApp:
     def __init__(self, root):
         """Initialize the main application."""
@@ -27,12 +150,15 @@ class StudySleepApp:
         self.preferences = PreferencesManager()
         self.task_db = TaskDatabase()
         self.task_learner = TaskLearner(self.task_db)
+        # Load NumPy and compile the learner kernels now, off the Tk thread, so the
+        # first break doesn't stall the UI on JIT compilation
+        threading.Thread(target=warm_up_kernels, daemon=True).start()
         
         # State
         self.is_monitoring = False
         self.reference_set = False
         self.diagnostic_photo_valid = True  # Track if diagnostic photo has sufficient data
-        self.last_break_time = 0
+        self.last_break_time = float('-inf')  # time.monotonic() of last break/reminder
         self.min_break_interval = 60  # Minimum seconds between breaks
         
         # Track indices over time for weighted threshold
@@ -59,6 +185,8 @@ class StudySleepApp:
             'yawn_score': 0.25
         }
         self.current_scaler = 300.0  # Default 300 seconds at max tiredness (5 minutes)
+        # current_weightages values as last stored in the DB for this task/subject (None = no row)
+        self._persisted_weightages: Optional[Tuple] = None
         self.session_breaks = []  # Track breaks for learning
         self.breaks_triggered = 0
         self.total_break_time = 0
@@ -66,6 +194,10 @@ class StudySleepApp:
         self.dominant_index_name = None  # Track which index triggered the alert
         self.break_active = False  # Prevent re-triggering while a break is running
         
+        # Last values rendered into UI labels (skip redundant widget updates)
+        self._last_weightages_tuple: Optional[Tuple] = None
+        self._last_debug_output: Optional[str] = None
+        
         # UI Setup
         self.setup_ui()
 
@@ -306,6 +438,10 @@ class StudySleepApp:
         else:
             self.current_weightages = self.task_learner.get_initial_weightages(task_id, task_name)
             self.scaler = 300.0  # Default for new task
+        # Remember what is stored, so end_session only writes weights that changed
+        # (the scaler is persisted separately after each break)
+        stored = self.task_db.get_exact_task_weightages(task_id, self.current_subject_id or None)
+        self._persisted_weightages = tuple(stored[k] for k in WEIGHT_KEYS) if stored else None
         
         # Start new session
         self.current_session_id = self.task_db.start_session(task_id)
@@ -314,6 +450,7 @@ class StudySleepApp:
         self.total_break_time = 0
         
         # Update UI
+        self._last_weightages_tuple = None
         self.task_status_label.config(
             text=(
                 f"Task: {task_name} | Weights: "
@@ -459,7 +596,7 @@ class StudySleepApp:
                 # Calculate core 4 indices
                 drowsiness_index, slouching_index, attention_index, yawn_score, debug_info = self.detector.calculate_drowsiness_index(frame)
                 
-                current_time = time.time()
+                current_time = time.monotonic()  # Interval source, immune to clock changes
                 
                 # Create indices dict for calculations
                 indices_dict = {
@@ -514,8 +651,15 @@ class StudySleepApp:
                     if time_above_threshold >= 4.0:
                         # Always trigger timer, no alternation
                         if current_time - self.last_break_time >= self.min_break_interval:
-                            # Find highest raw value index (not weighted)
-                            highest_index = max(indices_dict.keys(), key=lambda k: indices_dict[k])
+                            # Find highest raw value index (not weighted); ties go to the first key
+                            dom_idx, vmax = 0, drowsiness_index
+                            if slouching_index > vmax:
+                                dom_idx, vmax = 1, slouching_index
+                            if attention_index > vmax:
+                                dom_idx, vmax = 2, attention_index
+                            if yawn_score > vmax:
+                                dom_idx = 3
+                            highest_index = INDEX_KEYS[dom_idx]
                             self.dominant_index_name = highest_index
                             self.high_index_start_time = None
 
@@ -554,7 +698,7 @@ class StudySleepApp:
         """Update all index displays and debug info."""
         # Debug: Print attention tracking info every 5 seconds
         if hasattr(self, '_last_attention_debug_time'):
-            if time.time() - self._last_attention_debug_time > 5:
+            if time.monotonic() - self._last_attention_debug_time > 5:
                 if debug_info and 'raw_values' in debug_info:
                     print(f"\n=== Attention Debug ===")
                     print(f"Attention Index: {attention_idx:.3f}")
@@ -569,9 +713,9 @@ class StudySleepApp:
                     if 'attention_no_history' in debug_info['raw_values']:
                         print("No attention history!")
                     print("=====================\n")
-                self._last_attention_debug_time = time.time()
+                self._last_attention_debug_time = time.monotonic()
         else:
-            self._last_attention_debug_time = time.time()
+            self._last_attention_debug_time = time.monotonic()
         
         # Calculate weighted tiredness for display
         indices_dict = {
@@ -610,8 +754,6 @@ class StudySleepApp:
     
     def update_debug_display(self, debug_info: dict):
         """Update the debug text widget with raw values."""
-        self.debug_text.delete(1.0, tk.END)
-        
         output = "=== RAW VALUES ===\n\n"
         
         # EAR values
@@ -671,77 +813,32 @@ class StudySleepApp:
             output += f"  Mouse Entropy: {input_metrics.get('mouse_entropy', 0):.3f}\n"
             output += f"  Idle Seconds: {input_metrics.get('idle_seconds', 0):.1f}\n"
         
+        # Only touch the Text widget (and trigger a redraw) when the content changed
+        if output == self._last_debug_output:
+            return
+        self._last_debug_output = output
+        self.debug_text.delete(1.0, tk.END)
         self.debug_text.insert(1.0, output)
     
-    def get_index_warning_info(self, index_name: str) -> dict:
+    def get_index_warning_info(self, index_name: str) -> WarningInfo:
         """Get detailed warning information for a specific index."""
-        warnings = {
-            'drowsiness': {
-                'title': '😴 Drowsiness Detected',
-                'problem': 'Your eyes are showing significant closure, indicating drowsiness.',
-                'immediate_fix': '• Look away from the screen\n• Blink deliberately several times\n• Take 5 deep breaths\n• Stand up and stretch',
-                'long_term_risk': 'Continued work while drowsy can lead to:\n• Reduced productivity and increased errors\n• Eye strain and headaches\n• Increased accident risk\n• Chronic fatigue if sleep-deprived',
-                'score': 'High drowsiness'
-            },
-            'slouching': {
-                'title': '🪑 Poor Posture Detected',
-                'problem': 'Your shoulders are significantly deviated from proper alignment.',
-                'immediate_fix': '• Sit up straight with shoulders back\n• Adjust your chair height\n• Position screen at eye level\n• Use lumbar support',
-                'long_term_risk': 'Prolonged poor posture can cause:\n• Chronic back and neck pain\n• Spinal misalignment and disc problems\n• Reduced lung capacity\n• Permanent postural changes',
-                'score': 'Severe slouching'
-            },
-            'attention': {
-                'title': '🎯 Attention Drift Detected',
-                'problem': 'You\'re frequently looking away from your work area.',
-                'immediate_fix': '• Refocus on your task\n• Remove distractions from view\n• Take a 2-minute mindfulness break\n• Set a smaller, achievable goal',
-                'long_term_risk': 'Consistent attention problems can lead to:\n• Decreased work quality and productivity\n• Increased time to complete tasks\n• Higher stress from unfinished work\n• Difficulty maintaining focus over time',
-                'score': 'High distraction'
-            },
-            'yawn_score': {
-                'title': '🥱 Frequent Yawning Detected',
-                'problem': 'You\'re yawning repeatedly, indicating significant fatigue.',
-                'immediate_fix': '• Take a 5-10 minute break\n• Get some fresh air or cold water\n• Do light physical activity\n• Consider a power nap (10-20 min)',
-                'long_term_risk': 'Ignoring fatigue signals can result in:\n• Accumulated sleep debt\n• Weakened immune system\n• Impaired cognitive function\n• Increased risk of burnout',
-                'score': 'High fatigue'
-            },
-            # Removed warnings for head_nodding, eye_smoothness, blink_variance
-        }
-        return warnings.get(index_name, {
-            'title': '⚠️ Tiredness Alert',
-            'problem': 'Elevated tiredness indicator detected.',
-            'immediate_fix': '• Take a short break\n• Rest and recharge',
-            'long_term_risk': 'Continued strain may affect health and productivity.',
-            'score': 'Elevated'
-        })
+        return _INDEX_WARNINGS.get(index_name, _DEFAULT_WARNING)
     
     def show_index_warning(self, index_name: str, index_value: float):
         """Show detailed popup warning for an elevated index."""
         info = self.get_index_warning_info(index_name)
+        message = _INDEX_WARNING_TEMPLATE.format(info=info, value=index_value)
         
-        message = f"{info['title']}\n"
-        message += f"Current Level: {index_value:.2f} / 1.00 ({info['score']})\n\n"
-        message += f"📊 WHAT'S HAPPENING:\n{info['problem']}\n\n"
-        message += f"✅ IMMEDIATE ACTIONS:\n{info['immediate_fix']}\n\n"
-        message += f"⚠️ LONG-TERM RISKS:\n{info['long_term_risk']}\n\n"
-        message += "Note: This is an informational warning. Work timers trigger separately based on overall tiredness."
-        
-        messagebox.showwarning(info['title'], message)
+        NonBlockingAlert(self.root, info.title, message)
     
     def show_reminder(self, reason: str):
         """Show reminder popup based on dominant index."""
-        index_messages = {
-            'drowsiness': "⚠️ Drowsiness Alert\n\nYou're showing signs of drowsiness. Consider taking a short break to rest your eyes and refresh.",
-            'slouching': "⚠️ Posture Alert\n\nYou're slouching too much! Poor posture can lead to back problems in the long run. Please sit up straight.",
-            'attention': "⚠️ Attention Alert\n\nYour attention seems to be drifting. Consider refocusing or taking a brief break.",
-            'yawn_score': "⚠️ Fatigue Alert\n\nYou're yawning frequently, indicating fatigue. A short break might help you recharge."
-        }
-        
-        message = index_messages.get(reason, "⚠️ Tiredness Alert\n\nYou're showing signs of tiredness. Consider taking a break.")
-        messagebox.showwarning("Reminder", message)
+        message = _REMINDER_MESSAGES.get(reason, _DEFAULT_REMINDER)
+        NonBlockingAlert(self.root, "Reminder", message)
         
         # Mark that last action was a reminder (next will be timer)
         self.last_action_was_timer = True
-        self.last_break_time = time.time()
+        self.last_break_time = time.monotonic()
     
     def trigger_break(self, duration: int, reason: str = "drowsiness",
                      drowsiness_idx: float = 0.0, slouching_idx: float = 0.0,
@@ -749,16 +846,10 @@ class StudySleepApp:
         """Trigger a break overlay with smart exit logic."""
         # Show break message with info for highest raw value index
         info = self.get_index_warning_info(reason)
-        message = f"Break needed! ({reason.capitalize()})\n\n"
-        message += f"{info['title']}\n\n"
-        message += f"📊 WHAT'S HAPPENING:\n{info['problem']}\n\n"
-        message += f"✅ IMMEDIATE ACTIONS:\n{info['immediate_fix']}\n\n"
-        message += f"⚠️ LONG-TERM RISKS:\n{info['long_term_risk']}\n\n"
-        message += f"Break duration: {duration} seconds. Use this time to test the suggested actions!"
-        messagebox.showinfo("Break Time", message)
+        message = _BREAK_TEMPLATE.format(reason=reason.capitalize(), info=info, duration=duration)
         
         # Track break for learning
-        break_start_time = time.time()
+        break_start_time = time.monotonic()
         self.breaks_triggered += 1
         
         # Create and start overlay (runs in main thread)
@@ -782,10 +873,14 @@ class StudySleepApp:
         # Mark break active immediately to avoid race with monitor thread
         self.break_active = True
         try:
-            print(f"[break] activated at {time.strftime('%H:%M:%S')} | reason={reason} | duration={duration}s")
+            ts = time.strftime(_STRFMT)
+            print(f"[break] activated at {ts} | reason={reason} | duration={duration}s")
         except Exception:
             pass
-        self.root.after(0, start_overlay)
+        # Non-modal alert: the overlay starts once the user dismisses it, without
+        # blocking the Tk main loop in the meantime
+        NonBlockingAlert(self.root, "Break Time", message,
+                         on_ok=lambda: self.root.after(0, start_overlay))
         
         # Mark that last action was a timer (next will be reminder)
         self.last_action_was_timer = False
@@ -798,7 +893,8 @@ class StudySleepApp:
         # Break finished; allow monitoring to trigger again
         self.break_active = False
         try:
-            print(f"[break] completed at {time.strftime('%H:%M:%S')} | actual_duration={break_duration}s | alert_before={alert_before} | drowsy_after={drowsy_after} | became_alert_at={became_alert_at}")
+            ts = time.strftime(_STRFMT)
+            print(f"[break] completed at {ts} | actual_duration={break_duration}s | alert_before={alert_before} | drowsy_after={drowsy_after} | became_alert_at={became_alert_at}")
         except Exception:
             pass
 
@@ -857,8 +953,9 @@ class StudySleepApp:
                         subject_id=subject_id,
                         scaler=new_scaler
                     )
+                    self.task_learner.invalidate(self.current_task_id)
         
-        messagebox.showinfo("Break Complete", "Break finished! You can continue studying.")
+        NonBlockingAlert(self.root, "Break Complete", "Break finished! You can continue studying.")
     
     def end_session(self):
         """End current session and learn from it."""
@@ -873,7 +970,9 @@ class StudySleepApp:
         )
         
         # Persist blended weights to database for current task/subject
-        if self.current_task_id:
+        # (skipped when they match what is already stored)
+        current = tuple(self.current_weightages[k] for k in INDEX_KEYS)
+        if self.current_task_id and current != self._persisted_weightages:
             indices_keys = ['drowsiness', 'slouching', 'attention', 'yawn_score']
             try:
                 self.task_db.update_task_weightages(
@@ -884,6 +983,8 @@ class StudySleepApp:
                     self.current_weightages['yawn_score'],
                     subject_id=self.current_subject_id
                 )
+                self._persisted_weightages = current
+                self.task_learner.invalidate(self.current_task_id)
             except Exception:
                 self.task_db.update_task_weightages(
                     self.current_task_id,
@@ -892,6 +993,7 @@ class StudySleepApp:
                     self.current_weightages['attention'],
                     self.current_weightages['yawn_score']
                 )
+                self.task_learner.invalidate(self.current_task_id)
                 # If you want to update related prompts, fix and re-enable this block:
                 # for related_id, related_name, similarity in related_tasks:
                 #     rel_weights = self.task_db.get_task_weightages(related_id)
@@ -913,8 +1015,10 @@ class StudySleepApp:
                 #             updated_vec[7]
                 #         )
                 # print(f"Updated related prompt '{related_name}' weights to {updated_vec}")
-                # Update UI
-                if self.current_task:
+                # Update UI (skip if the rounded weights shown are unchanged)
+                cur = (self.current_task,) + tuple(round(v, 2) for v in self.current_weightages.values())
+                if self.current_task and cur != self._last_weightages_tuple:
+                    self._last_weightages_tuple = cur
                     self.task_status_label.config(
                         text=f"Task: {self.current_task} | Updated Weights: "
                              f"D={self.current_weightages['drowsiness']:.2f}, "
@@ -933,6 +1037,7 @@ class StudySleepApp:
     def on_closing(self):
         """Handle application closing."""
         self.stop_monitoring()  # This will call end_session()
+        self.preferences.flush()  # Write any debounced preference changes
         self.detector.cleanup()
         self.root.destroy()
 
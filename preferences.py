@@ -1,8 +1,40 @@
 """User preferences management system."""
+import atexit
 import json
 import os
+import threading
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+    _HAVE_ORJSON = True
+except Exception:
+    _HAVE_ORJSON = False
+
+# Seconds to wait after the last change before writing preferences to disk
+SAVE_DEBOUNCE_SECONDS = 1.0
+
+@lru_cache(maxsize=1024)
+def _calc_break_duration(base_duration: int, max_duration: int, multiplier: float,
+                         drowsiness_index: float, distraction_index: float,
+                         attention_index: float) -> int:
+    """Pure break-duration formula, memoized on (rounded) inputs."""
+    base_duration = int(base_duration * multiplier)
+    
+    # Calculate weighted average (60% drowsiness, 30% distraction, 10% attention)
+    # This gives more weight to drowsiness but considers all factors
+    weighted_avg = (
+        drowsiness_index * 0.6 +
+        distraction_index * 0.3 +
+        attention_index * 0.1
+    )
+    
+    # Scale by weighted average: light (low) = small timer, heavy (high) = large timer
+    # Map 0.0-1.0 to base_duration-max_duration
+    duration = int(base_duration + (max_duration - base_duration) * weighted_avg)
+    return min(duration, max_duration)
+
 class PreferencesManager:
     def __init__(self, preferences_file: str = "preferences.json"):
         """
@@ -13,11 +45,23 @@ class PreferencesManager:
         """
         self.preferences_file = preferences_file
         self.preferences = self.load_preferences()
+        
+        # Debounced saving: setters mark dirty and schedule a single write
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        # Held across snapshot + write so concurrent writers share no temp file
+        # and an older snapshot can never replace a newer one on disk
+        self._write_lock = threading.Lock()
+        atexit.register(self.flush)
     
     def load_preferences(self) -> Dict[str, Any]:
         """Load preferences from file or create default."""
         if os.path.exists(self.preferences_file):
             try:
+                if _HAVE_ORJSON:
+                    with open(self.preferences_file, 'rb') as f:
+                        return orjson.loads(f.read())
                 with open(self.preferences_file, 'r') as f:
                     return json.load(f)
             except:
@@ -32,10 +76,55 @@ class PreferencesManager:
             'current_subject': None
         }
     
+    def _serialize(self) -> bytes:
+        """Encode the current preferences; call with _save_lock held so setters can't mutate mid-encode."""
+        if _HAVE_ORJSON:
+            return orjson.dumps(self.preferences, option=orjson.OPT_INDENT_2)
+        return json.dumps(self.preferences, indent=2).encode('utf-8')
+    
+    def _write(self, data: bytes):
+        """Write encoded preferences to file atomically (temp file + rename); call with _write_lock held."""
+        tmp_file = self.preferences_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, self.preferences_file)
+    
     def save_preferences(self):
-        """Save preferences to file."""
-        with open(self.preferences_file, 'w') as f:
-            json.dump(self.preferences, f, indent=2)
+        """Save preferences to file atomically (temp file + rename)."""
+        with self._write_lock:
+            with self._save_lock:
+                data = self._serialize()
+            self._write(data)
+    
+    def _schedule_save(self):
+        """Mark preferences dirty and (re)start the debounce timer."""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk immediately, if any."""
+        with self._write_lock:
+            with self._save_lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                # Snapshot under the lock; the (slow) file write happens outside it
+                data = self._serialize()
+                self._dirty = False
+            try:
+                self._write(data)
+            except Exception:
+                # Keep the change pending so the next flush (e.g. on exit) retries it
+                with self._save_lock:
+                    self._dirty = True
+                raise
     
     def set_subject_tiredness(self, subject: str, multiplier: float):
         """
@@ -45,8 +134,9 @@ class PreferencesManager:
             subject: Name of the subject
             multiplier: Multiplier (higher = more tired, e.g., 1.5 = 50% more tired)
         """
-        self.preferences['subject_tiredness'][subject] = multiplier
-        self.save_preferences()
+        with self._save_lock:
+            self.preferences['subject_tiredness'][subject] = multiplier
+        self._schedule_save()
     
     def get_subject_tiredness(self, subject: str) -> float:
         """Get tiredness multiplier for a subject (default 1.0)."""
@@ -54,8 +144,9 @@ class PreferencesManager:
     
     def set_current_subject(self, subject: str):
         """Set the current subject being studied."""
-        self.preferences['current_subject'] = subject
-        self.save_preferences()
+        with self._save_lock:
+            self.preferences['current_subject'] = subject
+        self._schedule_save()
     
     def get_current_subject(self) -> Optional[str]:
         """Get the current subject."""
@@ -74,27 +165,19 @@ class PreferencesManager:
         Returns:
             Break duration in seconds
         """
-        base_duration = self.preferences['base_break_duration']
-        max_duration = self.preferences['max_break_duration']
-        
         # Apply subject tiredness multiplier
         subject = self.get_current_subject()
-        if subject:
-            multiplier = self.get_subject_tiredness(subject)
-            base_duration = int(base_duration * multiplier)
+        multiplier = self.get_subject_tiredness(subject) if subject else 1.0
         
-        # Calculate weighted average (60% drowsiness, 30% distraction, 10% attention)
-        # This gives more weight to drowsiness but considers all factors
-        weighted_avg = (
-            drowsiness_index * 0.6 +
-            distraction_index * 0.3 +
-            attention_index * 0.1
+        # Indices are rounded to 2 decimals so repeated detector readings hit the cache
+        return _calc_break_duration(
+            self.preferences['base_break_duration'],
+            self.preferences['max_break_duration'],
+            multiplier,
+            round(drowsiness_index, 2),
+            round(distraction_index, 2),
+            round(attention_index, 2)
         )
-        
-        # Scale by weighted average: light (low) = small timer, heavy (high) = large timer
-        # Map 0.0-1.0 to base_duration-max_duration
-        duration = int(base_duration + (max_duration - base_duration) * weighted_avg)
-        return min(duration, max_duration)
     
     def get_drowsiness_threshold(self) -> float:
         """Get the drowsiness threshold for triggering breaks."""
@@ -1,9 +1,109 @@
 """Semantic similarity matching for task names using AI embeddings via API."""
+import asyncio
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import json
 import os
 
+try:
+    import httpx
+    _HAVE_HTTPX = True
+except Exception:
+    _HAVE_HTTPX = False
+
+# Router endpoint returns one pooled sentence vector per input for sentence-transformers models
+HF_API_URL = "https://router.huggingface.co/hf-inference/models/{model}/pipeline/feature-extraction"
+HF_OPTIONS = {"wait_for_model": True, "use_cache": True}
+OPENAI_API_URL = "https://api.openai.com/v1/embeddings"
+HTTP_TIMEOUT = 30.0
+
+# Maximum number of texts whose (int8-quantized) embeddings are kept in memory
+EMBEDDING_CACHE_SIZE = 1024
+
+# Maximum number of candidate lists whose stacked embedding matrices are kept
+CANDIDATE_MATRIX_CACHE_SIZE = 32
+
+# Maximum number of texts whose keyword bitmasks are kept, and of distinct words
+# in the shared vocabulary before it (and every mask built on it) is rebuilt
+TOKEN_CACHE_SIZE = 4096
+VOCAB_SIZE = 8192
+
+
+def _popcount(mask: int) -> int:
+    """Number of set bits in an int bitmask."""
+    return mask.bit_count() if hasattr(mask, 'bit_count') else bin(mask).count("1")
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    """Scale an embedding to unit L2 norm so cosine similarity is a plain dot product."""
+    embedding /= np.linalg.norm(embedding) + 1e-12
+    return embedding
+
+
+def _quantize(embedding: np.ndarray) -> Tuple[np.float32, np.ndarray]:
+    """Quantize an embedding to int8 with a per-vector scale (4x smaller than float32)."""
+    scale = np.float32(np.max(np.abs(embedding)) / 127.0) or np.float32(1.0)
+    return scale, np.round(embedding / scale).astype(np.int8)
+
+
+def _dequantize(scale: np.float32, quantized: np.ndarray) -> np.ndarray:
+    """Inverse of _quantize."""
+    return quantized.astype(np.float32) * scale
+
+
+def _int8_scores(query: Tuple[np.float32, np.ndarray],
+                 candidates: List[Tuple[np.float32, np.ndarray]]) -> np.ndarray:
+    """Dot products of int8-quantized candidates with a quantized query.
+    
+    Accumulates in int32 and applies the per-vector scales afterwards, so the
+    candidates never need to be dequantized.
+    """
+    query_scale, query_q = query
+    scales = np.array([scale for scale, _ in candidates], dtype=np.float32)
+    mat = np.stack([q for _, q in candidates]).astype(np.int32)
+    return (mat @ query_q.astype(np.int32)) * (scales * query_scale)
+
+
+def _cosine_scores(query: np.ndarray, mat: np.ndarray) -> np.ndarray:
+    """Dot product of each row of mat (N x D) with query as one BLAS gemv.
+    
+    Rows and query are L2-normalized, so this is their cosine similarity.
+    """
+    return mat @ query
+
+
+def _select_topk(sims: np.ndarray, k: int, thr: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k highest scores that are at or above thr.
+    
+    Returns:
+        (indices into sims, scores), highest score first
+    """
+    keep = np.flatnonzero(sims >= thr)
+    if k <= 0:
+        keep = keep[:0]
+    elif len(keep) > k:
+        # Partial sort: O(N) selection of the top k before the final ordering
+        keep = keep[np.argpartition(-sims[keep], k - 1)[:k]]
+    order = keep[np.argsort(-sims[keep], kind='stable')]
+    return order, sims[order]
+
+
+def _cosine_topk(query: np.ndarray, mat: np.ndarray, k: int, thr: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k rows of mat most cosine-similar to query.
+    
+    Args:
+        query: Query embedding (D,)
+        mat: Candidate embeddings stacked as rows (N x D)
+        k: Maximum number of rows to return
+        thr: Minimum raw cosine similarity (-1.0 to 1.0) to keep
+        
+    Returns:
+        (row indices, cosine similarities), highest similarity first
+    """
+    return _select_topk(_cosine_scores(query, mat), k, thr)
+
 class SemanticMatcher:
     """
     Uses API-based embeddings to compute semantic similarity between task names.
@@ -26,6 +126,14 @@ class SemanticMatcher:
         self.api_provider = api_provider
         self.api_key = None
         self.model_name = None
+        self._http = None  # Pooled keep-alive HTTP client, created on first API call
+        # Keyword fallback: word -> bit position, and text -> bitmask of its words
+        self._vocab: Dict[str, int] = {}
+        self._token_cache: Dict[str, int] = {}
+        # text -> int8-quantized embedding (scale, values)
+        self._embedding_cache: Dict[str, Tuple[np.float32, np.ndarray]] = {}
+        # tuple of candidate texts -> their normalized embeddings stacked as rows
+        self._candidate_mat_cache: Dict[Tuple[str, ...], np.ndarray] = {}
         self._setup_api()
     
     def _setup_api(self):
@@ -60,29 +168,126 @@ class SemanticMatcher:
         else:
             print("ℹ  Using local keyword matching (no API)")
     
+    def _auth_headers(self) -> Dict[str, str]:
+        """HTTP headers sent with every embedding request."""
+        return {"Authorization": f"Bearer {self.api_key}"}
+    
+    def _get_http_client(self):
+        """
+        Get the pooled HTTP client, creating it on first use.
+        
+        Reusing one client keeps the TCP+TLS connection alive between embedding
+        calls. Uses httpx (HTTP/2 when the 'h2' package is installed) and falls
+        back to a requests.Session.
+        """
+        if self._http is None:
+            if _HAVE_HTTPX:
+                try:
+                    self._http = httpx.Client(http2=True, timeout=HTTP_TIMEOUT, headers=self._auth_headers())
+                except ImportError:
+                    # HTTP/2 support requires the optional 'h2' package
+                    self._http = httpx.Client(timeout=HTTP_TIMEOUT, headers=self._auth_headers())
+            else:
+                import requests
+                self._http = requests.Session()
+                self._http.headers.update(self._auth_headers())
+        return self._http
+    
+    def close(self):
+        """Close the pooled HTTP client."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _parse_hf_response(self, response) -> Optional[np.ndarray]:
+        """Turn a Hugging Face feature-extraction response into an embedding."""
+        if response.status_code == 200:
+            # float32 halves memory traffic and doubles SIMD width vs NumPy's float64 default
+            embedding = np.asarray(response.json(), dtype=np.float32)
+            # Token-level output (older endpoint/models): mean-pool
+            if embedding.ndim > 1:
+                embedding = embedding.mean(axis=0, dtype=np.float32)
+            return _normalize(embedding)
+        print(f"HF API error: {response.status_code} - {response.text}")
+        return None
+    
+    def _parse_openai_response(self, response) -> Optional[np.ndarray]:
+        """Turn an OpenAI embeddings response into an embedding."""
+        if response.status_code == 200:
+            data = response.json()
+            return _normalize(np.asarray(data['data'][0]['embedding'], dtype=np.float32))
+        print(f"OpenAI API error: {response.status_code} - {response.text}")
+        return None
+    
+    def _parse_hf_batch_response(self, response) -> Optional[np.ndarray]:
+        """Turn a Hugging Face feature-extraction response for a list of inputs into an (N, D) matrix."""
+        if response.status_code == 200:
+            rows = []
+            for item in response.json():
+                embedding = np.asarray(item, dtype=np.float32)
+                # Token-level output (older endpoint/models): mean-pool
+                if embedding.ndim > 1:
+                    embedding = embedding.mean(axis=0, dtype=np.float32)
+                rows.append(embedding)
+            mat = np.stack(rows)
+            mat /= np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+            return mat
+        print(f"HF API error: {response.status_code} - {response.text}")
+        return None
+    
+    def _parse_openai_batch_response(self, response) -> Optional[np.ndarray]:
+        """Turn an OpenAI embeddings response for a list of inputs into an (N, D) matrix."""
+        if response.status_code == 200:
+            data = sorted(response.json()['data'], key=lambda d: d['index'])
+            mat = np.asarray([d['embedding'] for d in data], dtype=np.float32)
+            mat /= np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+            return mat
+        print(f"OpenAI API error: {response.status_code} - {response.text}")
+        return None
+    
+    def _get_hf_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Get embeddings for several texts from one Hugging Face Inference API request."""
+        try:
+            response = self._get_http_client().post(
+                HF_API_URL.format(model=self.model_name),
+                json={"inputs": texts, "options": HF_OPTIONS},
+                timeout=HTTP_TIMEOUT
+            )
+            return self._parse_hf_batch_response(response)
+                
+        except Exception as e:
+            print(f"Error calling Hugging Face API: {e}")
+            return None
+    
+    def _get_openai_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Get embeddings for several texts from one OpenAI API request."""
+        try:
+            response = self._get_http_client().post(
+                OPENAI_API_URL,
+                json={"input": texts, "model": self.model_name},
+                timeout=HTTP_TIMEOUT
+            )
+            return self._parse_openai_batch_response(response)
+                
+        except Exception as e:
+            print(f"Error calling OpenAI API: {e}")
+            return None
+    
     def _get_hf_embedding(self, text: str) -> Optional[np.ndarray]:
         """Get embedding from Hugging Face Inference API."""
         try:
-            import requests
-            
-            api_url = f"https://api-inference.huggingface.co/pipeline/feature-extraction/{self.model_name}"
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            
-            response = requests.post(
-                api_url,
-                headers=headers,
-                json={"inputs": text, "options": {"wait_for_model": True}}
+            response = self._get_http_client().post(
+                HF_API_URL.format(model=self.model_name),
+                json={"inputs": text, "options": HF_OPTIONS},
+                timeout=HTTP_TIMEOUT
             )
-            
-            if response.status_code == 200:
-                embedding = np.array(response.json())
-                # If the response is a list of embeddings, take the mean
-                if len(embedding.shape) > 1:
-                    embedding = np.mean(embedding, axis=0)
-                return embedding
-            else:
-                print(f"HF API error: {response.status_code} - {response.text}")
-                return None
+            return self._parse_hf_response(response)
                 
         except Exception as e:
             print(f"Error calling Hugging Face API: {e}")
@@ -91,31 +296,64 @@ class SemanticMatcher:
     def _get_openai_embedding(self, text: str) -> Optional[np.ndarray]:
         """Get embedding from OpenAI API."""
         try:
-            import requests
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                "https://api.openai.com/v1/embeddings",
-                headers=headers,
-                json={"input": text, "model": self.model_name}
+            response = self._get_http_client().post(
+                OPENAI_API_URL,
+                json={"input": text, "model": self.model_name},
+                timeout=HTTP_TIMEOUT
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                embedding = np.array(data['data'][0]['embedding'])
-                return embedding
-            else:
-                print(f"OpenAI API error: {response.status_code} - {response.text}")
-                return None
+            return self._parse_openai_response(response)
                 
         except Exception as e:
             print(f"Error calling OpenAI API: {e}")
             return None
     
+    async def _get_hf_embedding_async(self, client, text: str) -> Optional[np.ndarray]:
+        """Async variant of _get_hf_embedding using a shared httpx.AsyncClient."""
+        try:
+            response = await client.post(
+                HF_API_URL.format(model=self.model_name),
+                json={"inputs": text, "options": HF_OPTIONS}
+            )
+            return self._parse_hf_response(response)
+        except Exception as e:
+            print(f"Error calling Hugging Face API: {e}")
+            return None
+    
+    async def _get_openai_embedding_async(self, client, text: str) -> Optional[np.ndarray]:
+        """Async variant of _get_openai_embedding using a shared httpx.AsyncClient."""
+        try:
+            response = await client.post(
+                OPENAI_API_URL,
+                json={"input": text, "model": self.model_name}
+            )
+            return self._parse_openai_response(response)
+        except Exception as e:
+            print(f"Error calling OpenAI API: {e}")
+            return None
+    
+    def _cache_embedding(self, text: str, embedding: np.ndarray):
+        """Store an embedding in the in-memory cache as int8, evicting the oldest entry if full."""
+        if len(self._embedding_cache) >= EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.pop(next(iter(self._embedding_cache)))
+        self._embedding_cache[text] = _quantize(embedding)
+    
+    async def compute_embedding_async(self, client, text: str) -> Optional[np.ndarray]:
+        """Async variant of compute_embedding; client is an httpx.AsyncClient."""
+        cached = self._embedding_cache.get(text)
+        if cached is not None:
+            return _dequantize(*cached)
+        
+        if self.api_provider == 'huggingface':
+            embedding = await self._get_hf_embedding_async(client, text)
+        elif self.api_provider == 'openai':
+            embedding = await self._get_openai_embedding_async(client, text)
+        else:
+            return None
+        
+        if embedding is not None:
+            self._cache_embedding(text, embedding)
+        return embedding
+    
     def compute_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Compute semantic embedding for a text string via API.
@@ -124,14 +362,59 @@ class SemanticMatcher:
             text: The text to embed
             
         Returns:
-            Numpy array of embeddings, or None if API unavailable
+            L2-normalized numpy array of embeddings, or None if API unavailable
         """
+        cached = self._embedding_cache.get(text)
+        if cached is not None:
+            return _dequantize(*cached)
+        
         if self.api_provider == 'huggingface':
-            return self._get_hf_embedding(text)
+            embedding = self._get_hf_embedding(text)
         elif self.api_provider == 'openai':
-            return self._get_openai_embedding(text)
+            embedding = self._get_openai_embedding(text)
         else:
             return None
+        
+        if embedding is not None:
+            self._cache_embedding(text, embedding)
+        return embedding
+    
+    def encode_batch(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Compute embeddings for several texts, fetching all uncached ones in a single API request.
+        
+        Args:
+            texts: Texts to embed (duplicates are fine)
+            
+        Returns:
+            (N, D) float32 matrix of L2-normalized embeddings in the order of texts,
+            or None if the API is unavailable
+        """
+        if self.api_provider not in ('huggingface', 'openai'):
+            return None
+        
+        # Take cache hits before storing new embeddings, which may evict entries
+        found: Dict[str, np.ndarray] = {}
+        for text in texts:
+            cached = self._embedding_cache.get(text)
+            if cached is not None:
+                found[text] = _dequantize(*cached)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        
+        if missing:
+            if self.api_provider == 'huggingface':
+                embeddings = self._get_hf_embeddings(missing)
+            else:
+                embeddings = self._get_openai_embeddings(missing)
+            if embeddings is None or len(embeddings) != len(missing):
+                return None
+            for text, embedding in zip(missing, embeddings):
+                self._cache_embedding(text, embedding)
+                found[text] = embedding
+        
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[text] for text in texts]).astype(np.float32, copy=False)
     
     def compute_similarity(self, text1: str, text2: str) -> float:
         """
@@ -154,10 +437,8 @@ class SemanticMatcher:
             if emb1 is None or emb2 is None:
                 return self._jaccard_similarity(text1, text2)
             
-            # Compute cosine similarity
-            similarity = np.dot(emb1, emb2) / (
-                np.linalg.norm(emb1) * np.linalg.norm(emb2)
-            )
+            # Embeddings are unit-length, so cosine similarity is just the dot product
+            similarity = np.dot(emb1, emb2)
             
             # Convert from [-1, 1] to [0, 1] range
             similarity = (similarity + 1) / 2
@@ -193,52 +474,161 @@ class SemanticMatcher:
             if query_emb is None:
                 return self._fallback_similarity(query, candidates, threshold, limit)
             
-            # Get embeddings for all candidates (batch if possible)
-            results = []
+            mat = self._candidate_matrix(tuple(text for _, text in candidates))
+            if mat is None:
+                return self._fallback_similarity(query, candidates, threshold, limit)
             
-            for candidate_id, candidate_text in candidates:
-                candidate_emb = self.compute_embedding(candidate_text)
-                
-                if candidate_emb is not None:
-                    # Compute cosine similarity
-                    similarity = np.dot(query_emb, candidate_emb) / (
-                        np.linalg.norm(query_emb) * np.linalg.norm(candidate_emb)
-                    )
-                    # Convert from [-1, 1] to [0, 1]
-                    similarity = (similarity + 1) / 2
-                    
-                    if similarity >= threshold:
-                        results.append((candidate_id, candidate_text, float(similarity)))
+            # One gemv scores every candidate; similarities are reported in [0, 1],
+            # so convert the threshold back to raw cosine
+            rows, sims = _cosine_topk(np.asarray(query_emb, dtype=np.float32), mat, limit,
+                                      2.0 * threshold - 1.0)
+            return [(candidates[row][0], candidates[row][1], float((sim + 1) / 2))
+                    for row, sim in zip(rows, sims)]
             
-            # Sort by similarity (descending)
-            results.sort(key=lambda x: x[2], reverse=True)
-            return results[:limit]
+        except Exception as e:
+            print(f"Error in semantic matching: {e}")
+            return self._fallback_similarity(query, candidates, threshold, limit)
+    
+    async def find_most_similar_async(self, query: str, candidates: List[Tuple[int, str]],
+                                      threshold: float = 0.6, limit: int = 5) -> List[Tuple[int, str, float]]:
+        """
+        Async variant of find_most_similar that embeds the query and all
+        candidates concurrently over one pooled HTTP/2 connection.
+        
+        Falls back to the synchronous path when httpx is not installed.
+        """
+        if not candidates:
+            return []
+        
+        if self.api_provider == 'none' or not _HAVE_HTTPX:
+            return self.find_most_similar(query, candidates, threshold, limit)
+        
+        try:
+            try:
+                client = httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, headers=self._auth_headers())
+            except ImportError:
+                client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, headers=self._auth_headers())
+            async with client:
+                embeddings = await asyncio.gather(
+                    self.compute_embedding_async(client, query),
+                    *[self.compute_embedding_async(client, text) for _, text in candidates]
+                )
+            
+            query_emb, candidate_embs = embeddings[0], embeddings[1:]
+            if query_emb is None:
+                return self._fallback_similarity(query, candidates, threshold, limit)
+            return self._rank_candidates(query_emb, candidates, candidate_embs, threshold, limit,
+                                         query_text=query)
             
         except Exception as e:
             print(f"Error in semantic matching: {e}")
             return self._fallback_similarity(query, candidates, threshold, limit)
     
+    def _candidate_matrix(self, texts: Tuple[str, ...]) -> Optional[np.ndarray]:
+        """
+        Get the (N x D) float32 matrix of normalized embeddings for a candidate list.
+        
+        Matrices are cached per candidate list, so repeated lookups against the
+        same set of tasks skip both the embedding and the stacking.
+        """
+        mat = self._candidate_mat_cache.get(texts)
+        if mat is None:
+            mat = self.encode_batch(list(texts))
+            if mat is None:
+                return None
+            mat = np.ascontiguousarray(mat, dtype=np.float32)
+            if len(self._candidate_mat_cache) >= CANDIDATE_MATRIX_CACHE_SIZE:
+                self._candidate_mat_cache.pop(next(iter(self._candidate_mat_cache)))
+            self._candidate_mat_cache[texts] = mat
+        return mat
+    
+    def _rank_candidates(self, query_emb: np.ndarray, candidates: List[Tuple[int, str]],
+                         candidate_embs: List[Optional[np.ndarray]],
+                         threshold: float, limit: int,
+                         query_text: Optional[str] = None) -> List[Tuple[int, str, float]]:
+        """Score candidates by cosine similarity to the query embedding."""
+        valid = [i for i, emb in enumerate(candidate_embs) if emb is not None]
+        if not valid:
+            return []
+        
+        # Similarities are reported in [0, 1]; convert the threshold back to raw cosine
+        raw_threshold = 2.0 * threshold - 1.0
+        
+        # If everything is in the int8 cache, score the quantized vectors directly
+        query_q = self._embedding_cache.get(query_text) if query_text is not None else None
+        candidates_q = [self._embedding_cache.get(candidates[i][1]) for i in valid]
+        if query_q is not None and all(q is not None for q in candidates_q):
+            rows, sims = _select_topk(_int8_scores(query_q, candidates_q), limit, raw_threshold)
+        else:
+            # Stack candidates into one N x D matrix and score them in a single pass
+            # (embeddings are already unit-length, so the scores are cosine similarities)
+            mat = np.stack([np.asarray(candidate_embs[i], dtype=np.float32) for i in valid])
+            query_vec = np.asarray(query_emb, dtype=np.float32)
+            rows, sims = _cosine_topk(query_vec, mat, limit, raw_threshold)
+        
+        results = []
+        for row, sim in zip(rows, sims):
+            candidate_id, candidate_text = candidates[valid[row]]
+            # Convert from [-1, 1] to [0, 1]
+            results.append((candidate_id, candidate_text, float((sim + 1) / 2)))
+        return results
+    
+    def _token_mask(self, text: str) -> int:
+        """
+        Get the word set of a text as an int bitmask over a shared vocabulary.
+        
+        Masks are cached per text, so set intersection/union become a single
+        integer AND/OR instead of building Python sets on every comparison.
+        """
+        mask = self._token_cache.get(text)
+        if mask is None:
+            mask = 0
+            for word in text.lower().split():
+                bit = self._vocab.get(word)
+                if bit is None:
+                    bit = self._vocab[word] = len(self._vocab)
+                mask |= 1 << bit
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.pop(next(iter(self._token_cache)))
+            self._token_cache[text] = mask
+        return mask
+    
+    def _trim_vocab(self):
+        """
+        Drop the vocabulary and cached masks once the vocabulary is full.
+        
+        Bit positions are only meaningful within one vocabulary, so this must run
+        before a comparison starts building masks, never in the middle of one.
+        """
+        if len(self._vocab) >= VOCAB_SIZE:
+            self._vocab.clear()
+            self._token_cache.clear()
+    
     def _jaccard_similarity(self, text1: str, text2: str) -> float:
         """Fallback: Simple Jaccard similarity based on word overlap."""
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
+        self._trim_vocab()
+        mask1 = self._token_mask(text1)
+        mask2 = self._token_mask(text2)
         
-        if len(words1 | words2) == 0:
+        union = _popcount(mask1 | mask2)
+        if union == 0:
             return 0.0
         
-        return len(words1 & words2) / len(words1 | words2)
+        return _popcount(mask1 & mask2) / union
     
     def _fallback_similarity(self, query: str, candidates: List[Tuple[int, str]], 
                             threshold: float, limit: int) -> List[Tuple[int, str, float]]:
         """Fallback similarity using Jaccard when API unavailable."""
         results = []
-        query_words = set(query.lower().split())
+        self._trim_vocab()
+        query_mask = self._token_mask(query)
         
         for candidate_id, candidate_text in candidates:
-            candidate_words = set(candidate_text.lower().split())
+            candidate_mask = self._token_mask(candidate_text)
+            union = _popcount(query_mask | candidate_mask)
             
-            if len(query_words | candidate_words) > 0:
-                similarity = len(query_words & candidate_words) / len(query_words | candidate_words)
+            if union > 0:
+                similarity = _popcount(query_mask & candidate_mask) / union
                 
                 if similarity >= threshold:
                     results.append((candidate_id, candidate_text, similarity))
@@ -246,7 +636,6 @@ class SemanticMatcher:
         results.sort(key=lambda x: x[2], reverse=True)
         return results[:limit]
 
-
 # Global instance (lazy loaded)
 _semantic_matcher = None
 
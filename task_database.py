@@ -1,9 +1,316 @@
 """Database system for storing tasks and learned weightages."""
 import sqlite3
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Prepared statements cached per connection (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Page size for newly created database files
+PAGE_SIZE = 8192
+
+# Bytes of the database file to memory-map for reads (256 MiB); disabled on
+# 32-bit builds where that much address space is not available
+MMAP_SIZE = 268435456 if sys.maxsize > 2**32 else 0
+
+# Buffered break events are written once this many have accumulated
+BREAK_FLUSH_THRESHOLD = 32
+
+# Bump whenever EXPECTED_SCHEMA, _COLUMN_RENAMES or _DEPRECATED_COLUMNS change
+CURRENT_MIGRATION_VERSION = 11
+
+# Columns that older databases may be missing, with the type used to add them.
+# Columns present since the first release (ids, foreign keys, timestamps) are
+# not listed.
+EXPECTED_SCHEMA = {
+    'task_sessions': {
+        'subject_id': 'INTEGER',
+    },
+    'task_weightages': {
+        'subject_id': 'INTEGER',
+        'slouching_weight': 'REAL DEFAULT 0.20',
+        'attention_weight': 'REAL DEFAULT 0.20',
+        'yawn_score_weight': 'REAL DEFAULT 0.15',
+        'scaler': 'REAL DEFAULT 300.0',
+    },
+    'break_events': {
+        'slouching_index': 'REAL NOT NULL DEFAULT 0.0',
+        'attention_index': 'REAL NOT NULL DEFAULT 0.0',
+        'yawn_score_index': 'REAL NOT NULL DEFAULT 0.0',
+    },
+}
+
+# Data copied into a newly added column from the column it replaces:
+# (table, old_col, new_col, expression over the old row)
+_COLUMN_RENAMES = [
+    ('task_weightages', 'distraction_weight', 'slouching_weight', 'distraction_weight'),
+    ('break_events', 'distraction_index', 'slouching_index', 'distraction_index'),
+    ('task_weightages', 'gaze_fixation_weight', 'attention_weight', 'gaze_fixation_weight'),
+    ('break_events', 'gaze_fixation_index', 'attention_index', 'gaze_fixation_index'),
+    # Old coefficient was a multiplier of a ~180s base duration; the scaler is
+    # the duration at full tiredness (duration = scaler × weighted_score)
+    ('task_weightages', 'timer_coefficient', 'scaler', 'timer_coefficient * 180.0'),
+]
+
+# Columns from earlier schema versions, dropped once their data has been copied
+_DEPRECATED_COLUMNS = {
+    'task_weightages': ('distraction_weight', 'gaze_fixation_weight', 'blink_rate_weight',
+                        'blink_duration_weight', 'expressiveness_weight', 'head_nodding_weight',
+                        'eye_smoothness_weight', 'blink_variance_weight', 'timer_coefficient'),
+    'break_events': ('distraction_index', 'gaze_fixation_index', 'blink_rate_index',
+                     'blink_duration_index', 'expressiveness_index', 'head_nodding_index',
+                     'eye_smoothness_index', 'blink_variance_index'),
+}
+
+# Current DDL for tables that _drop_columns may rebuild ({table} is the table name)
+_TABLE_DDL = {
+    'break_events': '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        break_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        break_duration INTEGER NOT NULL,
+        drowsiness_index REAL NOT NULL,
+        slouching_index REAL NOT NULL,
+        attention_index REAL NOT NULL,
+        yawn_score_index REAL NOT NULL,
+        user_alert_before_timer BOOLEAN DEFAULT 0,
+        user_drowsy_after_timer BOOLEAN DEFAULT 0,
+        FOREIGN KEY (session_id) REFERENCES task_sessions(id)
+    )
+''',
+    'task_weightages': '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        subject_id INTEGER,
+        drowsiness_weight REAL DEFAULT 0.25,
+        slouching_weight REAL DEFAULT 0.25,
+        attention_weight REAL DEFAULT 0.25,
+        yawn_score_weight REAL DEFAULT 0.25,
+        scaler REAL DEFAULT 300.0,
+        total_sessions INTEGER DEFAULT 0,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (task_id) REFERENCES tasks(id),
+        FOREIGN KEY (subject_id) REFERENCES subjects(id),
+        UNIQUE (task_id, subject_id)
+    )
+''',
+}
+
+# RETURNING clause and ALTER TABLE ... DROP COLUMN support (SQLite 3.35+)
+_HAVE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_HAVE_DROP_COLUMN = _HAVE_RETURNING
+
+# SQL for the hot paths. Kept as module constants so every call passes the
+# identical string and hits the connection's prepared-statement cache.
+_SQL_UPSERT_TASK = '''
+    INSERT INTO tasks (task_name) VALUES (?)
+    ON CONFLICT(task_name) DO UPDATE SET updated_at = updated_at
+    RETURNING id
+'''
+_SQL_INSERT_TASK = 'INSERT OR IGNORE INTO tasks (task_name) VALUES (?)'
+_SQL_GET_TASK_ID = 'SELECT id FROM tasks WHERE task_name = ?'
+
+_SQL_INSERT_DEFAULT_WEIGHTAGES = '''
+    INSERT OR IGNORE INTO task_weightages (task_id, subject_id, drowsiness_weight, slouching_weight,
+                                           attention_weight, yawn_score_weight)
+    VALUES (?, NULL, 0.25, 0.25, 0.25, 0.25)
+'''
+
+_SQL_UPSERT_SUBJECT = '''
+    INSERT INTO subjects (name, fingerprint, reference_json) VALUES (?, ?, ?)
+    ON CONFLICT(fingerprint) DO UPDATE
+    SET reference_json = COALESCE(NULLIF(excluded.reference_json, ''), subjects.reference_json)
+    RETURNING id
+'''
+
+_SQL_START_SESSION = '''
+    INSERT INTO task_sessions (task_id, subject_id, session_start)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+'''
+
+_SQL_END_SESSION = '''
+    UPDATE task_sessions
+    SET session_end = CURRENT_TIMESTAMP,
+        breaks_triggered = ?,
+        total_break_time = ?
+    WHERE id = ?
+'''
+
+_SQL_INSERT_BREAK = '''
+    INSERT INTO break_events 
+    (session_id, break_start, break_duration, drowsiness_index, slouching_index,
+     attention_index, yawn_score_index,
+     user_alert_before_timer, user_drowsy_after_timer)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_GET_WEIGHTAGES = '''
+    SELECT drowsiness_weight, slouching_weight, attention_weight, 
+           yawn_score_weight, total_sessions
+    FROM task_weightages
+    WHERE task_id = ? AND subject_id IS NULL
+'''
+
+# Generic weightages for several tasks at once (task ids listed in an IN clause)
+_SQL_GET_WEIGHTAGES_MANY = '''
+    SELECT task_id, drowsiness_weight, slouching_weight, attention_weight,
+           yawn_score_weight, total_sessions
+    FROM task_weightages
+    WHERE task_id IN ({placeholders}) AND subject_id IS NULL
+'''
+
+_SQL_GET_WEIGHTAGES_GENERIC = '''
+    SELECT drowsiness_weight, slouching_weight, attention_weight,
+           yawn_score_weight, scaler, total_sessions
+    FROM task_weightages
+    WHERE task_id = ? AND subject_id IS NULL
+'''
+
+_SQL_GET_WEIGHTAGES_SUBJECT = '''
+    SELECT drowsiness_weight, slouching_weight, attention_weight,
+           yawn_score_weight, scaler, total_sessions
+    FROM task_weightages
+    WHERE task_id = ? AND subject_id = ?
+'''
+
+# Insert or update the weightages row for (task_id, subject_id). The conflict
+# target matches the idx_weightages_task_subj unique index, so a NULL subject_id
+# conflicts like any other value. A NULL scaler (?7) keeps the stored value, or
+# the 300.0 default on insert.
+_SQL_UPSERT_WEIGHTAGES = '''
+    INSERT INTO task_weightages (task_id, subject_id, drowsiness_weight, slouching_weight,
+                                 attention_weight, yawn_score_weight, scaler, total_sessions)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, COALESCE(?7, 300.0), 1)
+    ON CONFLICT(task_id, IFNULL(subject_id, -1)) DO UPDATE
+    SET drowsiness_weight = excluded.drowsiness_weight,
+        slouching_weight = excluded.slouching_weight,
+        attention_weight = excluded.attention_weight,
+        yawn_score_weight = excluded.yawn_score_weight,
+        scaler = COALESCE(?7, task_weightages.scaler),
+        total_sessions = task_weightages.total_sessions + 1,
+        last_updated = CURRENT_TIMESTAMP
+'''
+
+# Tasks (other than the given one) whose generic weightages have been trained
+_SQL_TASKS_WITH_HISTORY = '''
+    SELECT t.id, t.task_name
+    FROM tasks t
+    JOIN task_weightages tw ON t.id = tw.task_id AND tw.subject_id IS NULL
+    WHERE t.task_name != ? AND tw.total_sessions > 0
+'''
+
+# Most recent break events for a task, newest first
+_SQL_BREAK_HISTORY = '''
+    SELECT be.drowsiness_index, be.slouching_index, be.attention_index,
+           be.yawn_score_index,
+           be.user_alert_before_timer, be.user_drowsy_after_timer,
+           be.break_duration
+    FROM break_events be
+    JOIN task_sessions ts ON be.session_id = ts.id
+    WHERE ts.task_id = ?
+    ORDER BY be.break_start DESC
+    LIMIT ?
+'''
+
+# Most recent break events for several tasks (listed in a VALUES CTE), at most
+# N per task, newest first within each task
+_SQL_BREAK_HISTORY_BULK = '''
+    WITH tids(tid) AS (VALUES {placeholders})
+    SELECT task_id, drowsiness_index, slouching_index, attention_index,
+           yawn_score_index, user_alert_before_timer, user_drowsy_after_timer,
+           break_duration
+    FROM (
+        SELECT ts.task_id, be.drowsiness_index, be.slouching_index, be.attention_index,
+               be.yawn_score_index,
+               be.user_alert_before_timer, be.user_drowsy_after_timer,
+               be.break_duration, be.break_start,
+               ROW_NUMBER() OVER (PARTITION BY ts.task_id ORDER BY be.break_start DESC) AS rn
+        FROM tids
+        JOIN task_sessions ts ON ts.task_id = tids.tid
+        JOIN break_events be ON be.session_id = ts.id
+    )
+    WHERE rn <= ?
+    ORDER BY task_id, rn
+'''
+
+# One buffered break_events row, fields in _SQL_INSERT_BREAK placeholder order
+_BreakRow = namedtuple('_BreakRow', 'session_id break_start break_duration drowsiness_index '
+                                    'slouching_index attention_index yawn_score_index '
+                                    'alert_before drowsy_after')
+
+def _break_dict(r) -> Dict:
+    """Convert a _SQL_BREAK_HISTORY row to the dict returned by get_task_break_history."""
+    return {
+        'drowsiness_index': r[0],
+        'slouching_index': r[1],
+        'attention_index': r[2],
+        'yawn_score_index': r[3],
+        'alert_before': bool(r[4]),
+        'drowsy_after': bool(r[5]),
+        'break_duration': r[6]
+    }
+
+def _weightages_dict(r) -> Dict:
+    """Convert a _SQL_GET_WEIGHTAGES row to the dict returned by get_task_weightages."""
+    return {
+        'drowsiness_weight': r[0],
+        'slouching_weight': r[1],
+        'attention_weight': r[2],
+        'yawn_score_weight': r[3],
+        'total_sessions': r[4]
+    }
+
+def _utc_timestamp() -> str:
+    """Current UTC time in the same format as SQLite's CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+@contextmanager
+def _savepoint(cursor: sqlite3.Cursor, name: str = 'mig') -> Iterator[None]:
+    """Run a block inside a SAVEPOINT; roll back to it (and re-raise) on error."""
+    cursor.execute(f'SAVEPOINT {name}')
+    try:
+        yield
+    except Exception:
+        cursor.execute(f'ROLLBACK TO {name}')
+        cursor.execute(f'RELEASE {name}')
+        raise
+    cursor.execute(f'RELEASE {name}')
+
+def _close_connection(conn: sqlite3.Connection, lock: threading.RLock,
+                      break_buf: List[_BreakRow], pending_lock: threading.Lock):
+    """
+    Write any buffered break events and close the connection.
+    
+    This is TaskDatabase's weakref.finalize callback, so it takes the object's
+    state rather than the object itself.
+    """
+    with pending_lock:
+        rows = break_buf[:]
+        break_buf.clear()
+    with lock:
+        try:
+            if rows:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany(_SQL_INSERT_BREAK, rows)
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        finally:
+            conn.close()
 
 class TaskDatabase:
     def __init__(self, db_file: str = "tasks.db"):
@@ -14,13 +321,103 @@ class TaskDatabase:
             db_file: Path to SQLite database file
         """
         self.db_file = db_file
+        
+        # One connection for the object's lifetime; the RLock serializes access
+        # from the GUI and monitoring threads
+        self._conn = self._connect()
+        self._lock = threading.RLock()
+        
+        # Cached get_task_weightages_for_subject results keyed by (task_id, subject_id).
+        # Writes bump the version and clear the cache; a read only stores its result
+        # if no write happened while it was querying.
+        self._weight_cache: Dict[Tuple[int, Optional[int]], Optional[Dict]] = {}
+        self._weight_cache_version = 0
+        self._weight_cache_lock = threading.Lock()
+        
+        # Break events waiting to be written in one batch (see record_break)
+        self._break_buf: List[_BreakRow] = []
+        self._pending_lock = threading.Lock()
+        # Flush and close on close(), garbage collection or interpreter exit. The
+        # finalizer holds the object's state, not the object, so discarded
+        # instances can still be collected.
+        self._finalizer = weakref.finalize(self, _close_connection, self._conn, self._lock,
+                                           self._break_buf, self._pending_lock)
+        
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the database connection.
+        
+        The connection runs in autocommit mode (transactions are opened
+        explicitly by _writer). WAL lets other processes read while we write,
+        busy_timeout waits for locks instead of failing with "database is
+        locked", and synchronous=NORMAL (safe under WAL) avoids an fsync on
+        every commit. Reads go through a memory map (mmap_size), trading
+        address space for fewer read() syscalls.
+        """
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        # page_size only takes effect on a new, empty database, so it must run
+        # before journal_mode=WAL (which initializes the file)
+        conn.execute(f'PRAGMA page_size={PAGE_SIZE}')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache
+        if MMAP_SIZE:
+            conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        return conn
+    
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Cursor]:
+        """Yield a cursor on the shared connection for read-only queries."""
+        with self._lock:
+            yield self._conn.cursor()
+    
+    @contextmanager
+    def _writer(self) -> Iterator[sqlite3.Cursor]:
+        """Yield a cursor inside a transaction; commit on success, roll back on error."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+    
+    def close(self):
+        """Flush buffered break events and close the connection (idempotent)."""
+        self._finalizer()
+    
     def init_database(self):
-        """Initialize database tables."""
-        conn = sqlite3.connect(self.db_file)
+        """
+        Initialize database tables.
+        
+        Table creation and migrations are skipped when the schema recorded in
+        _meta still matches the file and all migrations have already run.
+        """
+        with self._lock:
+            self._init_schema(self._conn)
+    
+    def _init_schema(self, conn: sqlite3.Connection):
+        """Create tables, run migrations and indexes, and record the schema in _meta."""
         cursor = conn.cursor()
         
+        if self._schema_is_current(cursor):
+            return
+        
+        # Schema bookkeeping (schema_version, migration_version)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS _meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        
         # Tasks table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tasks (
@@ -47,41 +444,11 @@ class TaskDatabase:
         
         # Break events table (tracks each break)
         # Tracks 4 indices: drowsiness, slouching, attention, yawn_score
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS break_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                break_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                break_duration INTEGER NOT NULL,
-                drowsiness_index REAL NOT NULL,
-                slouching_index REAL NOT NULL,
-                attention_index REAL NOT NULL,
-                yawn_score_index REAL NOT NULL,
-                user_alert_before_timer BOOLEAN DEFAULT 0,
-                user_drowsy_after_timer BOOLEAN DEFAULT 0,
-                FOREIGN KEY (session_id) REFERENCES task_sessions(id)
-            )
-        ''')
+        cursor.execute(_TABLE_DDL['break_events'].format(table='break_events'))
         
         # Task weightages table (learned weights for each task)
         # Tracks 4 indices: drowsiness, slouching, attention, yawn_score
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS task_weightages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_id INTEGER NOT NULL,
-                subject_id INTEGER,
-                drowsiness_weight REAL DEFAULT 0.25,
-                slouching_weight REAL DEFAULT 0.25,
-                attention_weight REAL DEFAULT 0.25,
-                yawn_score_weight REAL DEFAULT 0.25,
-                scaler REAL DEFAULT 300.0,
-                total_sessions INTEGER DEFAULT 0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks(id),
-                FOREIGN KEY (subject_id) REFERENCES subjects(id),
-                UNIQUE (task_id, subject_id)
-            )
-        ''')
+        cursor.execute(_TABLE_DDL['task_weightages'].format(table='task_weightages'))
 
         # Subjects table to store per-person reference vectors and optional name
         cursor.execute('''
@@ -94,370 +461,359 @@ class TaskDatabase:
             )
         ''')
         
+        # Run migrations for existing databases
+        changes = self._migrate_database(conn)
+        
+        # Indexes reference migrated columns (e.g. subject_id), so create them last
+        self._create_indexes(conn)
+        
+        # Record the resulting schema so the next start can skip all of the above
+        cursor.execute('PRAGMA schema_version')
+        schema_version = cursor.fetchone()[0]
+        cursor.executemany(
+            'INSERT OR REPLACE INTO _meta (key, value) VALUES (?, ?)',
+            [('schema_version', str(schema_version)),
+             ('migration_version', str(CURRENT_MIGRATION_VERSION))]
+        )
         conn.commit()
         
-        # Run migrations for existing databases
-        self._migrate_database(conn)
+        # One summary line per adopted schema (per-step details are logged at DEBUG)
+        if changes:
+            print(f"Database schema updated to v{CURRENT_MIGRATION_VERSION}: " + "; ".join(changes))
+
+    def _drop_columns(self, cursor: sqlite3.Cursor, table: str, columns: List[str], existing: set):
+        """
+        Remove columns from a table.
         
-        conn.close()
+        Uses ALTER TABLE ... DROP COLUMN on SQLite 3.35+. Older versions rebuild
+        the table: create it fresh from its DDL, copy the surviving columns,
+        drop the old one and rename the copy (indexes are recreated afterwards
+        by _create_indexes).
+        """
+        if _HAVE_DROP_COLUMN:
+            for col in columns:
+                cursor.execute(f'ALTER TABLE {table} DROP COLUMN {col}')
+            return
+        
+        new_table = f'{table}_new'
+        cursor.execute(_TABLE_DDL[table].format(table=new_table))
+        cursor.execute(f'PRAGMA table_info({new_table})')
+        new_columns = {row[1] for row in cursor.fetchall()}
+        keep = ', '.join(col for col in existing if col in new_columns and col not in columns)
+        cursor.execute(f'INSERT INTO {new_table} ({keep}) SELECT {keep} FROM {table}')
+        cursor.execute(f'DROP TABLE {table}')
+        cursor.execute(f'ALTER TABLE {new_table} RENAME TO {table}')
     
-    def _migrate_database(self, conn):
-        """Migrate existing database schema to latest version."""
+    def _create_indexes(self, conn):
+        """Create indexes for the hot lookups (break history, weightages per task/subject)."""
         cursor = conn.cursor()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_break_events_session
+            ON break_events(session_id, break_start DESC)
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_sessions_task ON task_sessions(task_id)')
+        
+        # UNIQUE (task_id, subject_id) treats NULLs as distinct, so older databases
+        # may hold several generic rows per task. Earlier versions read and trained
+        # the first (lowest id) row, so keep that one before enforcing uniqueness.
+        cursor.execute('''
+            DELETE FROM task_weightages
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM task_weightages
+                GROUP BY task_id, IFNULL(subject_id, -1)
+            )
+        ''')
+        if cursor.rowcount > 0:
+            logger.info("Removed %d duplicate task_weightages row(s)", cursor.rowcount)
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_weightages_task_subj
+            ON task_weightages(task_id, IFNULL(subject_id, -1))
+        ''')
+        # tasks.task_name and subjects.fingerprint are UNIQUE and already indexed
+        conn.commit()
+    
+    def _schema_is_current(self, cursor: sqlite3.Cursor) -> bool:
+        """Return True if _meta matches PRAGMA schema_version and the latest migration."""
+        try:
+            cursor.execute('SELECT key, value FROM _meta')
+            meta = dict(cursor.fetchall())
+        except sqlite3.OperationalError:
+            return False  # No _meta table yet
+        cursor.execute('PRAGMA schema_version')
+        schema_version = cursor.fetchone()[0]
+        return (meta.get('schema_version') == str(schema_version)
+                and meta.get('migration_version') == str(CURRENT_MIGRATION_VERSION))
+    
+    def _migrate_database(self, conn):
+        """
+        Migrate existing database schema to latest version.
         
-        # Check if task_weightages has subject_id column
-        cursor.execute("PRAGMA table_info(task_weightages)")
-        columns = [row[1] for row in cursor.fetchall()]
+        Adds any column from EXPECTED_SCHEMA that is missing (copying data over
+        from its predecessor listed in _COLUMN_RENAMES), then drops the
+        _DEPRECATED_COLUMNS. All steps run in a single transaction (one commit
+        instead of one per ALTER); each step gets its own savepoint so a failing
+        step is rolled back without aborting the others.
         
-        # Migration 1: Add subject_id column if missing
-        if 'subject_id' not in columns:
-            try:
-                cursor.execute('ALTER TABLE task_weightages ADD COLUMN subject_id INTEGER')
-                print("Migration: Added subject_id column to task_weightages")
-            except sqlite3.OperationalError:
-                pass  # Column already exists or other issue
-        
-        # Migration 2: Add new index columns to task_weightages if missing
-        new_columns = [
-            ('gaze_fixation_weight', 'REAL DEFAULT 0.15'),
-            ('yawn_score_weight', 'REAL DEFAULT 0.15'),
-            ('blink_rate_weight', 'REAL DEFAULT 0.10'),
-            ('blink_duration_weight', 'REAL DEFAULT 0.10'),
-            ('expressiveness_weight', 'REAL DEFAULT 0.10')
-        ]
-        
-        for col_name, col_type in new_columns:
-            if col_name not in columns:
-                try:
-                    cursor.execute(f'ALTER TABLE task_weightages ADD COLUMN {col_name} {col_type}')
-                    print(f"Migration: Added {col_name} column to task_weightages")
-                except sqlite3.OperationalError:
-                    pass
-        
-        # Migration 3: Check if break_events has new index columns
-        cursor.execute("PRAGMA table_info(break_events)")
-        break_columns = [row[1] for row in cursor.fetchall()]
-        
-        new_break_columns = [
-            ('gaze_fixation_index', 'REAL NOT NULL DEFAULT 0.0'),
-            ('yawn_score_index', 'REAL NOT NULL DEFAULT 0.0'),
-            ('blink_rate_index', 'REAL NOT NULL DEFAULT 0.0'),
-            ('blink_duration_index', 'REAL NOT NULL DEFAULT 0.0'),
-            ('expressiveness_index', 'REAL NOT NULL DEFAULT 0.0')
-        ]
-        
-        for col_name, col_type in new_break_columns:
-            if col_name not in break_columns:
+        Returns:
+            Descriptions of the changes made (empty if already up to date)
+        """
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            changes: List[str] = []
+            
+            for table, expected in EXPECTED_SCHEMA.items():
+                # Read column metadata once; the set is kept current as columns change
+                cursor.execute(f"PRAGMA table_info({table})")
+                existing = {row[1] for row in cursor.fetchall()}
+            
+                for col, col_type in expected.items():
+                    if col in existing:
+                        continue
+                    source = next(((old_col, expr) for t, old_col, new_col, expr in _COLUMN_RENAMES
+                                   if t == table and new_col == col and old_col in existing), None)
+                    try:
+                        with _savepoint(cursor):
+                            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {col} {col_type}')
+                            if source:
+                                old_col, expr = source
+                                cursor.execute(f'UPDATE {table} SET {col} = {expr} WHERE {old_col} IS NOT NULL')
+                                change = f"renamed {old_col} to {col} in {table}"
+                            else:
+                                change = f"added {col} column to {table}"
+                        existing.add(col)
+                        changes.append(change)
+                        logger.debug("Migration: %s", change)
+                    except sqlite3.OperationalError as e:
+                        logger.warning("Migration warning: %s", e)
+            
+                # Drop columns left behind by earlier versions (their data was copied above)
+                dead = [col for col in _DEPRECATED_COLUMNS.get(table, ()) if col in existing]
+                if not dead:
+                    continue
                 try:
-                    cursor.execute(f'ALTER TABLE break_events ADD COLUMN {col_name} {col_type}')
-                    print(f"Migration: Added {col_name} column to break_events")
-                except sqlite3.OperationalError:
-                    pass
-        
-        # Migration 4: Rename distraction to slouching (add slouching columns, copy data if exists)
-        # Refresh column lists
-        cursor.execute("PRAGMA table_info(task_weightages)")
-        columns = [row[1] for row in cursor.fetchall()]
-        cursor.execute("PRAGMA table_info(break_events)")
-        break_columns = [row[1] for row in cursor.fetchall()]
-        
-        if 'slouching_weight' not in columns and 'distraction_weight' in columns:
-            try:
-                # Add slouching_weight column
-                cursor.execute('ALTER TABLE task_weightages ADD COLUMN slouching_weight REAL DEFAULT 0.20')
-                # Copy distraction data to slouching
-                cursor.execute('UPDATE task_weightages SET slouching_weight = distraction_weight')
-                print("Migration: Renamed distraction_weight to slouching_weight in task_weightages")
-            except sqlite3.OperationalError:
-                pass
-        
-        if 'slouching_index' not in break_columns and 'distraction_index' in break_columns:
-            try:
-                # Add slouching_index column
-                cursor.execute('ALTER TABLE break_events ADD COLUMN slouching_index REAL NOT NULL DEFAULT 0.0')
-                # Copy distraction data to slouching
-                cursor.execute('UPDATE break_events SET slouching_index = distraction_index')
-                print("Migration: Renamed distraction_index to slouching_index in break_events")
-            except sqlite3.OperationalError:
-                pass
-        
-        # Migration 5: Remove old attention/distraction columns if they exist
-        if 'attention_weight' in columns:
-            # SQLite doesn't support DROP COLUMN before 3.35.0
-            # For now, we'll just leave it and ignore it
-            print("Note: Old attention_weight column exists but will be ignored")
-        
-        if 'attention_index' in break_columns:
-            print("Note: Old attention_index column exists but will be ignored")
-        
-        if 'distraction_weight' in columns:
-            print("Note: Old distraction_weight column exists but will be ignored (use slouching_weight)")
-        
-        if 'distraction_index' in break_columns:
-            print("Note: Old distraction_index column exists but will be ignored (use slouching_index)")
-        
-        # Migration 6: Remove blink columns and rename gaze_fixation to attention (7 -> 5 indices)
-        # Refresh column lists
-        cursor.execute("PRAGMA table_info(task_weightages)")
-        columns = [row[1] for row in cursor.fetchall()]
-        cursor.execute("PRAGMA table_info(break_events)")
-        break_columns = [row[1] for row in cursor.fetchall()]
-        
-        # Add attention_weight if missing, copy from gaze_fixation_weight if available
-        if 'attention_weight' not in columns:
-            try:
-                cursor.execute('ALTER TABLE task_weightages ADD COLUMN attention_weight REAL DEFAULT 0.20')
-                if 'gaze_fixation_weight' in columns:
-                    cursor.execute('UPDATE task_weightages SET attention_weight = gaze_fixation_weight')
-                    print("Migration: Renamed gaze_fixation_weight to attention_weight in task_weightages")
-                else:
-                    print("Migration: Added attention_weight column to task_weightages")
-            except sqlite3.OperationalError:
-                pass
-        
-        # Add attention_index to break_events if missing
-        if 'attention_index' not in break_columns:
-            try:
-                cursor.execute('ALTER TABLE break_events ADD COLUMN attention_index REAL NOT NULL DEFAULT 0.0')
-                if 'gaze_fixation_index' in break_columns:
-                    cursor.execute('UPDATE break_events SET attention_index = gaze_fixation_index')
-                    print("Migration: Renamed gaze_fixation_index to attention_index in break_events")
-                else:
-                    print("Migration: Added attention_index column to break_events")
-            except sqlite3.OperationalError:
-                pass
-        
-        # Note deprecated blink columns
-        if 'blink_rate_weight' in columns:
-            print("Note: Old blink_rate_weight column exists but will be ignored (removed from system)")
-        if 'blink_duration_weight' in columns:
-            print("Note: Old blink_duration_weight column exists but will be ignored (removed from system)")
-        if 'blink_rate_index' in break_columns:
-            print("Note: Old blink_rate_index column exists but will be ignored (removed from system)")
-        if 'blink_duration_index' in break_columns:
-            print("Note: Old blink_duration_index column exists but will be ignored (removed from system)")
-        if 'gaze_fixation_weight' in columns:
-            print("Note: Old gaze_fixation_weight column exists but will be ignored (use attention_weight)")
-        if 'gaze_fixation_index' in break_columns:
-            print("Note: Old gaze_fixation_index column exists but will be ignored (use attention_index)")
-        
-        # Migration 7 (deprecated): previously added head_nodding, eye_smoothness, blink_variance.
-        # No longer applicable in simplified 4-index system.
-        
-        # Note: expressiveness_weight/index columns remain for backward compatibility but unused
-        if 'expressiveness_weight' in columns:
-            print("Note: Old expressiveness_weight column exists but will be ignored (replaced by new indices)")
-        if 'expressiveness_index' in break_columns:
-            print("Note: Old expressiveness_index column exists but will be ignored (replaced by new indices)")
-        
-        # Migration 8: Add timer_coefficient for adaptive timer duration
-        cursor.execute("PRAGMA table_info(task_weightages)")
-        columns = [row[1] for row in cursor.fetchall()]
-        
-        if 'timer_coefficient' not in columns:
-            try:
-                cursor.execute('ALTER TABLE task_weightages ADD COLUMN timer_coefficient REAL DEFAULT 300.0')
-                print("Migration: Added timer_coefficient column to task_weightages")
-            except sqlite3.OperationalError:
-                pass
-
-        # Migration 9: Rename timer_coefficient to scaler and update semantics
-        # SQLite doesn't support RENAME COLUMN before 3.25, so we check if we need the rename
-        if 'timer_coefficient' in columns and 'scaler' not in columns:
-            try:
-                # Create new scaler column with default 300.0
-                cursor.execute('ALTER TABLE task_weightages ADD COLUMN scaler REAL DEFAULT 300.0')
-                # Copy values from timer_coefficient (converting multiplier to scaler)
-                # Old coefficient was multiplier (0.5-2.0 × base_duration)
-                # New scaler is direct (scaler × weighted_score)
-                # To preserve behavior: new_scaler = old_coeff × 180 (assuming avg base was 180s)
-                cursor.execute('UPDATE task_weightages SET scaler = timer_coefficient * 180.0 WHERE timer_coefficient IS NOT NULL')
-                print("Migration: Added scaler column and migrated data from timer_coefficient")
-                print("Note: timer_coefficient column will remain for backward compatibility but is deprecated")
-            except sqlite3.OperationalError as e:
-                print(f"Migration warning: {e}")
-
-        # If only scaler exists, we're on new schema
-        if 'scaler' in columns:
-            print("Using new scaler-based timer duration formula")
-        
-        conn.commit()
+                    with _savepoint(cursor):
+                        self._drop_columns(cursor, table, dead, existing)
+                    existing.difference_update(dead)
+                    change = f"dropped {', '.join(dead)} from {table}"
+                    changes.append(change)
+                    logger.debug("Migration: %s", change)
+                except sqlite3.OperationalError as e:
+                    logger.warning("Migration warning: %s", e)
+            
+            conn.commit()
+        except Exception:
+            # Steps roll back to their own savepoint on OperationalError; anything
+            # else must not leave the write transaction open
+            conn.rollback()
+            raise
+        return changes
     
     def get_or_create_task(self, task_name: str) -> int:
         """Get task ID or create new task if it doesn't exist."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Try to get existing task
-        cursor.execute('SELECT id FROM tasks WHERE task_name = ?', (task_name,))
-        result = cursor.fetchone()
-        
-        if result:
-            task_id = result[0]
-        else:
-            # Create new task
-            cursor.execute('INSERT INTO tasks (task_name) VALUES (?)', (task_name,))
-            task_id = cursor.lastrowid
+        # Existing tasks are the common case: one indexed read, no write transaction
+        with self._reader() as cursor:
+            cursor.execute(_SQL_GET_TASK_ID, (task_name,))
+            row = cursor.fetchone()
+        if row is not None:
+            return int(row[0])
+        
+        with self._writer() as cursor:
+            if _HAVE_RETURNING:
+                # Insert-or-fetch in one statement (the no-op update makes RETURNING
+                # yield the row if another writer created it since the read above)
+                cursor.execute(_SQL_UPSERT_TASK, (task_name,))
+            else:
+                cursor.execute(_SQL_INSERT_TASK, (task_name,))
+                cursor.execute(_SQL_GET_TASK_ID, (task_name,))
+            task_id = cursor.fetchone()[0]
             
-            # Initialize with equal weightages for 4 indices (sum to 1.0)
-            cursor.execute('''
-                INSERT INTO task_weightages (task_id, subject_id, drowsiness_weight, slouching_weight, 
-                                            attention_weight, yawn_score_weight)
-                VALUES (?, NULL, 0.25, 0.25, 0.25, 0.25)
-            ''', (task_id,))
-        # commit and return task id
-        conn.commit()
-        conn.close()
+            # Initialize with equal weightages for 4 indices (sum to 1.0);
+            # ignored if the task already has its generic row
+            cursor.execute(_SQL_INSERT_DEFAULT_WEIGHTAGES, (task_id,))
+            # Read before _writer's COMMIT, which resets rowcount to -1
+            created_weightages = cursor.rowcount > 0
+        if created_weightages:
+            self._invalidate_weight_cache()
         if task_id is None:
             raise RuntimeError('Failed to create task')
         return int(task_id)
     
     def start_session(self, task_id: int) -> int:
         """Start a new study session for a task."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO task_sessions (task_id, session_start)
-            VALUES (?, CURRENT_TIMESTAMP)
-        ''', (task_id,))
-
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._writer() as cursor:
+            cursor.execute(_SQL_START_SESSION, (task_id, None))
+            session_id = cursor.lastrowid
         if session_id is None:
             raise RuntimeError('Failed to start session')
         return int(session_id)
 
     def start_session_with_subject(self, task_id: int, subject_id: int) -> int:
         """Start a session linked to a subject."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO task_sessions (task_id, subject_id, session_start)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        ''', (task_id, subject_id))
-
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._writer() as cursor:
+            cursor.execute(_SQL_START_SESSION, (task_id, subject_id))
+            session_id = cursor.lastrowid
         if session_id is None:
             raise RuntimeError('Failed to start session with subject')
         return int(session_id)
 
     def get_or_create_subject(self, fingerprint: str, reference_json: Optional[str] = None, name: Optional[str] = None) -> int:
         """Get subject id by fingerprint or create a new subject entry."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT id FROM subjects WHERE fingerprint = ?', (fingerprint,))
-        row = cursor.fetchone()
-        if row:
-            sid = row[0]
-            # Optionally update reference_json if provided
-            if reference_json:
-                cursor.execute('UPDATE subjects SET reference_json = ? WHERE id = ?', (reference_json, sid))
-        else:
-            cursor.execute('INSERT INTO subjects (name, fingerprint, reference_json) VALUES (?, ?, ?)',
-                           (name, fingerprint, reference_json))
-            sid = cursor.lastrowid
-
-        conn.commit()
-        conn.close()
+        with self._writer() as cursor:
+            if _HAVE_RETURNING:
+                # Existing subjects only get reference_json replaced when a non-empty one is given
+                cursor.execute(_SQL_UPSERT_SUBJECT, (name, fingerprint, reference_json))
+                return int(cursor.fetchone()[0])
+            
+            cursor.execute('SELECT id FROM subjects WHERE fingerprint = ?', (fingerprint,))
+            row = cursor.fetchone()
+            if row:
+                sid = row[0]
+                # Optionally update reference_json if provided
+                if reference_json:
+                    cursor.execute('UPDATE subjects SET reference_json = ? WHERE id = ?', (reference_json, sid))
+            else:
+                cursor.execute('INSERT INTO subjects (name, fingerprint, reference_json) VALUES (?, ?, ?)',
+                               (name, fingerprint, reference_json))
+                sid = cursor.lastrowid
         if sid is None:
             raise RuntimeError('Failed to create/get subject')
         return int(sid)
     
     def end_session(self, session_id: int, breaks_triggered: int, total_break_time: int):
         """End a study session."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE task_sessions
-            SET session_end = CURRENT_TIMESTAMP,
-                breaks_triggered = ?,
-                total_break_time = ?
-            WHERE id = ?
-        ''', (breaks_triggered, total_break_time, session_id))
-        
-        conn.commit()
-        conn.close()
+        self.flush_breaks()
+        with self._writer() as cursor:
+            cursor.execute(_SQL_END_SESSION, (breaks_triggered, total_break_time, session_id))
     
     def record_break(self, session_id: int, break_duration: int, 
                      drowsiness_index: float, slouching_index: float,
                      attention_index: float, yawn_score_index: float,
                      user_alert_before: bool = False,
                      user_drowsy_after: bool = False):
-        """Record a break event with core 4 indices."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        """
+        Record a break event with core 4 indices.
         
-        cursor.execute('''
-            INSERT INTO break_events 
-            (session_id, break_duration, drowsiness_index, slouching_index,
-             attention_index, yawn_score_index,
-             user_alert_before_timer, user_drowsy_after_timer)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, break_duration, drowsiness_index, slouching_index,
-              attention_index, yawn_score_index,
-              1 if user_alert_before else 0, 1 if user_drowsy_after else 0))
+        Events are buffered and written in batches of BREAK_FLUSH_THRESHOLD;
+        end_session() and close() flush whatever is left.
+        """
+        # break_start is captured now, since the row may be written later
+        row = _BreakRow(session_id, _utc_timestamp(), break_duration, drowsiness_index,
+                        slouching_index, attention_index, yawn_score_index,
+                        user_alert_before, user_drowsy_after)
+        with self._pending_lock:
+            self._break_buf.append(row)
+            flush = len(self._break_buf) >= BREAK_FLUSH_THRESHOLD
+        if flush:
+            self.flush_breaks()
+    
+    def record_breaks(self, session_id: int, events: List[Dict]):
+        """
+        Record many break events for one session in a single transaction.
         
-        conn.commit()
-        conn.close()
+        Args:
+            session_id: Session the breaks belong to
+            events: Dicts with record_break's argument names (break_duration,
+                    drowsiness_index, slouching_index, attention_index,
+                    yawn_score_index, and optionally user_alert_before /
+                    user_drowsy_after / break_start)
+        """
+        now = _utc_timestamp()
+        rows = [_BreakRow(session_id, e.get('break_start', now), e['break_duration'],
+                          e['drowsiness_index'], e['slouching_index'],
+                          e['attention_index'], e['yawn_score_index'],
+                          bool(e.get('user_alert_before')), bool(e.get('user_drowsy_after')))
+                for e in events]
+        self._insert_breaks(rows)
+    
+    def flush_breaks(self):
+        """Write any buffered break events to the database."""
+        with self._pending_lock:
+            # Emptied in place: the finalizer holds this same list
+            rows = self._break_buf[:]
+            self._break_buf.clear()
+        self._insert_breaks(rows)
+    
+    def _insert_breaks(self, rows: List[_BreakRow]):
+        """
+        Insert break_events rows with one executemany in one transaction.
+        
+        _BreakRow fields are in _SQL_INSERT_BREAK placeholder order, so rows are
+        bound as-is (sqlite3 stores the bool flags as 0/1).
+        """
+        if not rows:
+            return
+        with self._writer() as cursor:
+            cursor.executemany(_SQL_INSERT_BREAK, rows)
     
     def get_task_weightages(self, task_id: int) -> Optional[Dict]:
         """Get current weightages for a task (4 indices).
 
         If a subject-specific weightage exists, return that when subject_id provided.
         """
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT drowsiness_weight, slouching_weight, attention_weight, 
-                   yawn_score_weight, total_sessions
-            FROM task_weightages
-            WHERE task_id = ? AND subject_id IS NULL
-        ''', (task_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self._reader() as cursor:
+            cursor.execute(_SQL_GET_WEIGHTAGES, (task_id,))
+            result = cursor.fetchone()
         
         if result:
-            return {
-                'drowsiness_weight': result[0],
-                'slouching_weight': result[1],
-                'attention_weight': result[2],
-                'yawn_score_weight': result[3],
-                'total_sessions': result[4]
-            }
+            return _weightages_dict(result)
         return None
+    
+    def get_task_weightages_many(self, task_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Get current weightages for several tasks in one query.
+        
+        Args:
+            task_ids: Tasks to fetch
+        
+        Returns:
+            Dict mapping task_id to the same dict get_task_weightages returns;
+            tasks without stored weightages are omitted
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return {}
+        
+        placeholders = ', '.join('?' for _ in task_ids)
+        with self._reader() as cursor:
+            cursor.execute(_SQL_GET_WEIGHTAGES_MANY.format(placeholders=placeholders), task_ids)
+            results = cursor.fetchall()
+        
+        return {r[0]: _weightages_dict(r[1:]) for r in results}
 
     def get_task_weightages_for_subject(self, task_id: int, subject_id: Optional[int]) -> Optional[Dict]:
         """Get weightages specifically for a task+subject (4 indices + scaler). Falls back to generic task weightages if none."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-
-        if subject_id is not None:
-            cursor.execute('''
-                SELECT drowsiness_weight, slouching_weight, attention_weight,
-                       yawn_score_weight, scaler, total_sessions
-                FROM task_weightages
-                WHERE task_id = ? AND subject_id = ?
-            ''', (task_id, subject_id))
-        else:
-            cursor.execute('''
-                SELECT drowsiness_weight, slouching_weight, attention_weight,
-                       yawn_score_weight, scaler, total_sessions
-                FROM task_weightages
-                WHERE task_id = ? AND subject_id IS NULL
-            ''', (task_id,))
-        
-        row = cursor.fetchone()
+        key = (task_id, subject_id)
+        with self._weight_cache_lock:
+            if key in self._weight_cache:
+                cached = self._weight_cache[key]
+                return dict(cached) if cached is not None else None
+            version = self._weight_cache_version
+        
+        result = self._query_weightages_for_subject(task_id, subject_id)
+        with self._weight_cache_lock:
+            if version == self._weight_cache_version:
+                self._weight_cache[key] = result
+        return dict(result) if result is not None else None
+    
+    def _query_weightages_for_subject(self, task_id: int, subject_id: Optional[int]) -> Optional[Dict]:
+        """Uncached lookup behind get_task_weightages_for_subject."""
+        row = self.get_exact_task_weightages(task_id, subject_id)
+        if row is not None:
+            return row
+        # Fallback to generic
+        return self.get_task_weightages(task_id)
+    
+    def get_exact_task_weightages(self, task_id: int, subject_id: Optional[int]) -> Optional[Dict]:
+        """Get the weightages row stored for exactly this task+subject, without any fallback."""
+        with self._reader() as cursor:
+            if subject_id is not None:
+                cursor.execute(_SQL_GET_WEIGHTAGES_SUBJECT, (task_id, subject_id))
+            else:
+                cursor.execute(_SQL_GET_WEIGHTAGES_GENERIC, (task_id,))
+            row = cursor.fetchone()
+        
         if row:
-            conn.close()
             return {
                 'drowsiness_weight': row[0],
                 'slouching_weight': row[1],
@@ -466,18 +822,13 @@ class TaskDatabase:
                 'scaler': row[4] if len(row) > 4 and row[4] is not None else 300.0,
                 'total_sessions': row[5] if len(row) > 5 else 0
             }
-        conn.close()
-        # Fallback to generic
-        return self.get_task_weightages(task_id)
+        return None
     
     def update_task_weightages(self, task_id: int, drowsiness_weight: float,
                                slouching_weight: float, attention_weight: float,
                                yawn_score_weight: float,
                                subject_id: Optional[int] = None, scaler: Optional[float] = None):
         """Update weightages for a task with 4 indices and optional scaler."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
         # Normalize weights to sum to 1.0
         total = (drowsiness_weight + slouching_weight + attention_weight + yawn_score_weight)
         if total > 0:
@@ -486,49 +837,46 @@ class TaskDatabase:
             attention_weight /= total
             yawn_score_weight /= total
         
-        # Upsert for (task_id, subject_id)
-        cursor.execute('''
-            SELECT id FROM task_weightages WHERE task_id = ? AND (
-                (subject_id IS NULL AND ? IS NULL) OR (subject_id = ?)
-            )
-        ''', (task_id, subject_id, subject_id))
-        row = cursor.fetchone()
-        if row:
-            if scaler is not None:
-                cursor.execute('''
-                    UPDATE task_weightages
-                    SET drowsiness_weight = ?,
-                        slouching_weight = ?,
-                        attention_weight = ?,
-                        yawn_score_weight = ?,
-                        scaler = ?,
-                        total_sessions = total_sessions + 1,
-                        last_updated = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (drowsiness_weight, slouching_weight, attention_weight,
-                      yawn_score_weight, scaler, row[0]))
-            else:
-                cursor.execute('''
-                    UPDATE task_weightages
-                    SET drowsiness_weight = ?,
-                        slouching_weight = ?,
-                        attention_weight = ?,
-                        yawn_score_weight = ?,
-                        total_sessions = total_sessions + 1,
-                        last_updated = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (drowsiness_weight, slouching_weight, attention_weight,
-                      yawn_score_weight, row[0]))
-        else:
-            cursor.execute('''
-                INSERT INTO task_weightages (task_id, subject_id, drowsiness_weight, slouching_weight,
-                                            attention_weight, yawn_score_weight, total_sessions)
-                VALUES (?, ?, ?, ?, ?, ?, 1)
-            ''', (task_id, subject_id, drowsiness_weight, slouching_weight,
-                  attention_weight, yawn_score_weight))
+        with self._writer() as cursor:
+            # Upsert for (task_id, subject_id)
+            cursor.execute(_SQL_UPSERT_WEIGHTAGES,
+                           (task_id, subject_id, drowsiness_weight, slouching_weight,
+                            attention_weight, yawn_score_weight, scaler))
+        self._invalidate_weight_cache()
+    
+    def _invalidate_weight_cache(self):
+        """Drop cached weightages after a write to task_weightages."""
+        with self._weight_cache_lock:
+            self._weight_cache_version += 1
+            self._weight_cache.clear()
+    
+    def update_task_weightages_batch(self, rows, task_ids: List[int],
+                                     subject_ids: Optional[List[Optional[int]]] = None):
+        """
+        Update weightages for many tasks at once (scalers are left unchanged).
         
-        conn.commit()
-        conn.close()
+        Args:
+            rows: (N, 4) array-like of drowsiness, slouching, attention, yawn_score weights
+            task_ids: N task IDs
+            subject_ids: N subject IDs (None entries, or None overall, for generic rows)
+        """
+        import numpy as np
+        
+        weights = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        if len(weights) != len(task_ids):
+            raise ValueError('rows and task_ids must have the same length')
+        if subject_ids is None:
+            subject_ids = [None] * len(task_ids)
+        
+        # Normalize each row to sum to 1.0 (rows summing to 0 are left as-is)
+        totals = weights.sum(axis=1, keepdims=True)
+        np.divide(weights, totals, out=weights, where=totals > 0)
+        
+        params = [(task_id, subject_id, *w, None)
+                  for task_id, subject_id, w in zip(task_ids, subject_ids, weights.tolist())]
+        with self._writer() as cursor:
+            cursor.executemany(_SQL_UPSERT_WEIGHTAGES, params)
+        self._invalidate_weight_cache()
 
     def get_similar_tasks(self, task_name: str, limit: int = 5) -> List[Tuple[int, str, float]]:
         """
@@ -542,25 +890,10 @@ class TaskDatabase:
         """
         from semantic_matcher import get_semantic_matcher
         
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Get all other tasks with their weightages
-        cursor.execute('''
-            SELECT t.id, t.task_name, tw.total_sessions
-            FROM tasks t
-            LEFT JOIN task_weightages tw ON t.id = tw.task_id AND tw.subject_id IS NULL
-            WHERE t.task_name != ?
-        ''', (task_name,))
-        all_tasks = cursor.fetchall()
-        conn.close()
-        
-        if not all_tasks:
-            return []
-        
-        # Filter to only tasks with training history (at least 1 session)
-        tasks_with_history = [(task_id, name) for task_id, name, sessions in all_tasks 
-                              if sessions and sessions > 0]
+        with self._reader() as cursor:
+            # Get all other tasks with training history (at least 1 session)
+            cursor.execute(_SQL_TASKS_WITH_HISTORY, (task_name,))
+            tasks_with_history = cursor.fetchall()
         
         if not tasks_with_history:
             return []
@@ -578,57 +911,81 @@ class TaskDatabase:
 
     def get_subject_by_name(self, name: str) -> Optional[Dict]:
         """Return subject row by name or None."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, name, fingerprint, reference_json FROM subjects WHERE name = ?', (name,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._reader() as cursor:
+            cursor.execute('SELECT id, name, fingerprint, reference_json FROM subjects WHERE name = ?', (name,))
+            row = cursor.fetchone()
         if row:
             return {'id': row[0], 'name': row[1], 'fingerprint': row[2], 'reference_json': row[3]}
         return None
 
     def get_subject_reference(self, subject_id: int) -> Optional[str]:
         """Return stored reference_json for a subject_id."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('SELECT reference_json FROM subjects WHERE id = ?', (subject_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self._reader() as cursor:
+            cursor.execute('SELECT reference_json FROM subjects WHERE id = ?', (subject_id,))
+            row = cursor.fetchone()
         if row:
             return row[0]
         return None
     
     def get_task_break_history(self, task_id: int, limit: int = 20) -> List[Dict]:
         """Get break history for a task to analyze patterns with 4 indices."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        self.flush_breaks()
+        with self._reader() as cursor:
+            cursor.execute(_SQL_BREAK_HISTORY, (task_id, limit))
+            results = cursor.fetchall()
         
-        cursor.execute('''
-            SELECT be.drowsiness_index, be.slouching_index, be.attention_index,
-                   be.yawn_score_index,
-                   be.user_alert_before_timer, be.user_drowsy_after_timer,
-                   be.break_duration
-            FROM break_events be
-            JOIN task_sessions ts ON be.session_id = ts.id
-            WHERE ts.task_id = ?
-            ORDER BY be.break_start DESC
-            LIMIT ?
-        ''', (task_id, limit))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'drowsiness_index': r[0],
-                'slouching_index': r[1],
-                'attention_index': r[2],
-                'yawn_score_index': r[3],
-                'alert_before': bool(r[4]),
-                'drowsy_after': bool(r[5]),
-                'break_duration': r[6]
-            }
-            for r in results
-        ]
-
-
+        return [_break_dict(r) for r in results]
+    
+    def get_task_break_history_bulk(self, task_ids: List[int], per_task_limit: int = 20) -> Dict[int, List[Dict]]:
+        """
+        Get break history for several tasks in one query.
+        
+        Args:
+            task_ids: Tasks to fetch
+            per_task_limit: Maximum number of (most recent) breaks per task
+        
+        Returns:
+            Dict mapping every requested task_id to its history, in the same
+            format and order as get_task_break_history (empty list if none)
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        history: Dict[int, List[Dict]] = {task_id: [] for task_id in task_ids}
+        if not task_ids:
+            return history
+        
+        self.flush_breaks()
+        placeholders = ', '.join('(?)' for _ in task_ids)
+        with self._reader() as cursor:
+            cursor.execute(_SQL_BREAK_HISTORY_BULK.format(placeholders=placeholders),
+                           (*task_ids, per_task_limit))
+            results = cursor.fetchall()
+        
+        for r in results:
+            history[r[0]].append(_break_dict(r[1:]))
+        return history
+    
+    def get_task_break_history_array(self, task_id: int, limit: int = 20):
+        """
+        Get break history for a task as NumPy arrays (newest first).
+        
+        Same rows as get_task_break_history, laid out column-wise for vectorized
+        statistics (e.g. indices.mean(axis=0)).
+        
+        Returns:
+            Tuple of (indices, flags, durations):
+            - indices: (N, 4) float32 of drowsiness, slouching, attention, yawn_score
+            - flags: (N, 2) bool of alert_before, drowsy_after
+            - durations: (N,) int32 break durations in seconds
+        """
+        import numpy as np
+        
+        self.flush_breaks()
+        with self._reader() as cursor:
+            cursor.execute(_SQL_BREAK_HISTORY, (task_id, limit))
+            results = cursor.fetchall()
+        
+        data = np.array(results, dtype=np.float64).reshape(-1, 7)
+        indices = data[:, 0:4].astype(np.float32)
+        flags = data[:, 4:6] > 0  # NULL (nan) counts as False
+        durations = data[:, 6].astype(np.int32)
+        return indices, flags, durations
@@ -1,7 +1,210 @@
 """AI learning system that adjusts weightages based on user reactions."""
+import operator
+import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from task_database import TaskDatabase
-from typing import Dict, List, Optional
-import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# NumPy and Numba are imported on first use rather than with this module, so
+# importing task_learner (e.g. at app startup) doesn't pay for them.
+_np = None
+_HAVE_NUMBA = None  # unknown until the kernels are first bound
+_bind_lock = threading.Lock()
+_kernels_bound = False
+
+
+def _numpy():
+    """Import NumPy on first call and return the module."""
+    global _np
+    if _np is None:
+        import numpy
+        _np = numpy
+    return _np
+
+
+def _scan_loop(idx_mat, alert, drowsy, out):
+    """
+    Accumulate per-index weight adjustments over a break history, as flat loops for Numba.
+    
+    Args:
+        idx_mat: (N, 4) index values per break, columns ordered as INDEX_KEYS
+        alert: (N,) True where the user was alert before the timer
+        drowsy: (N,) True where the user was still drowsy after the timer
+        out: (4,) receives the summed adjustments
+    
+    Returns:
+        Number of breaks that contributed an adjustment
+    """
+    a0 = 0.0
+    a1 = 0.0
+    a2 = 0.0
+    a3 = 0.0
+    count = 0
+    for i in range(idx_mat.shape[0]):
+        # Dominant index by an unrolled compare; ties go to the first key
+        dom = 0
+        best = idx_mat[i, 0]
+        if idx_mat[i, 1] > best:
+            dom = 1
+            best = idx_mat[i, 1]
+        if idx_mat[i, 2] > best:
+            dom = 2
+            best = idx_mat[i, 2]
+        if idx_mat[i, 3] > best:
+            dom = 3
+        if alert[i]:
+            delta = -0.05
+        elif drowsy[i]:
+            delta = 0.05
+        else:
+            delta = 0.0
+        if delta != 0.0:
+            count += 1
+        a0 += delta if dom == 0 else 0.0
+        a1 += delta if dom == 1 else 0.0
+        a2 += delta if dom == 2 else 0.0
+        a3 += delta if dom == 3 else 0.0
+    out[0] = a0
+    out[1] = a1
+    out[2] = a2
+    out[3] = a3
+    return count
+
+
+def _scan_numpy(idx_mat: 'np.ndarray', alert: 'np.ndarray', drowsy: 'np.ndarray', out: 'np.ndarray') -> int:
+    """Same as _scan_loop using column reductions."""
+    np = _numpy()
+    dominant = idx_mat.argmax(axis=1)
+    # Alert before timer reduces the dominant weight, drowsy after increases it
+    delta = np.where(alert, -0.05, np.where(drowsy, 0.05, 0.0))
+    out[:] = 0.0
+    np.add.at(out, dominant, delta)
+    return int((alert | drowsy).sum())
+
+
+def _clip_normalize4_loop(w, lo, hi):
+    """Clamp a length-4 weight vector to [lo, hi] and scale it to sum to 1, unrolled for Numba."""
+    w0 = min(hi, max(lo, w[0]))
+    w1 = min(hi, max(lo, w[1]))
+    w2 = min(hi, max(lo, w[2]))
+    w3 = min(hi, max(lo, w[3]))
+    total = w0 + w1 + w2 + w3
+    w[0] = w0 / total
+    w[1] = w1 / total
+    w[2] = w2 / total
+    w[3] = w3 / total
+    return w
+
+
+def _clip_normalize4_numpy(w: 'np.ndarray', lo: float, hi: float) -> 'np.ndarray':
+    """Same as _clip_normalize4_loop as two in-place NumPy calls."""
+    _numpy().clip(w, lo, hi, out=w)
+    w /= w.sum()
+    return w
+
+
+def _bind_kernels():
+    """
+    Bind _scan/_clip_normalize4 to their Numba-compiled versions when
+    numba is installed, else to the NumPy versions.
+    
+    The module-level names start out as stubs that call this once and then
+    forward, so later calls go straight to the bound kernel. The Numba kernels
+    are compiled here for explicit signatures (and cached on disk), so nothing
+    is compiled lazily on a later call.
+    """
+    global _scan, _clip_normalize4, _HAVE_NUMBA, _kernels_bound
+    with _bind_lock:
+        if _kernels_bound:
+            return
+        _numpy()
+        try:
+            from numba import njit
+            _HAVE_NUMBA = True
+        except Exception:
+            _HAVE_NUMBA = False
+        
+        if _HAVE_NUMBA:
+            _scan = njit('i8(f8[:, :], b1[:], b1[:], f8[:])', cache=True, fastmath=True)(_scan_loop)
+            _clip_normalize4 = njit('f8[:](f8[:], f8, f8)', cache=True, fastmath=True)(_clip_normalize4_loop)
+        else:
+            _scan = _scan_numpy
+            _clip_normalize4 = _clip_normalize4_numpy
+        _kernels_bound = True
+
+
+def warm_up_kernels():
+    """
+    Import NumPy and compile (or load from cache) the learner kernels ahead of use.
+    
+    Meant to run on a background thread at startup; a kernel call that arrives
+    first simply waits for the binding to finish.
+    """
+    _bind_kernels()
+
+
+def _scan(idx_mat, alert, drowsy, out):
+    _bind_kernels()
+    return _scan(idx_mat, alert, drowsy, out)
+
+
+def _clip_normalize4(w, lo, hi):
+    _bind_kernels()
+    return _clip_normalize4(w, lo, hi)
+
+# Index names and the matching task_weightages / break-history keys, in one fixed
+# order. Interned so dict lookups with them can match on identity.
+INDEX_KEYS = tuple(sys.intern(k) for k in ('drowsiness', 'slouching', 'attention', 'yawn_score'))
+WEIGHT_KEYS = tuple(sys.intern(f'{k}_weight') for k in INDEX_KEYS)
+INDEX_KEYS_IDX = tuple(sys.intern(f'{k}_index') for k in INDEX_KEYS)
+DEFAULT_WEIGHT = 1.0 / len(INDEX_KEYS)
+SIMILAR_CACHE_SIZE = 512
+
+_get_idx = operator.itemgetter(*INDEX_KEYS_IDX)
+
+
+def _index_values(break_event: Dict) -> tuple:
+    """The 4 index values of a break event in INDEX_KEYS order (0 for any missing)."""
+    try:
+        return _get_idx(break_event)
+    except KeyError:
+        return tuple(break_event.get(k, 0) for k in INDEX_KEYS_IDX)
+
+
+def _weighted_sum(indices: Dict[str, float], weightages: Dict[str, float]) -> float:
+    """Sum of index * weight over INDEX_KEYS (0 for any missing key), as plain float math."""
+    d, s, a, y = INDEX_KEYS
+    ig = indices.get
+    wg = weightages.get
+    return ig(d, 0.0) * wg(d, 0.0) + ig(s, 0.0) * wg(s, 0.0) + ig(a, 0.0) * wg(a, 0.0) + ig(y, 0.0) * wg(y, 0.0)
+
+
+def vec_from_db(row: Optional[Dict], default: float = 0.0) -> 'np.ndarray':
+    """
+    Pack a task_weightages row into a length-4 weight vector.
+    
+    Args:
+        row: Dict as returned by TaskDatabase.get_task_weightages (may be None)
+        default: Value used for any missing weight column
+    
+    Returns:
+        float64 array ordered as INDEX_KEYS
+    """
+    np = _numpy()
+    if not row:
+        return np.full(len(INDEX_KEYS), default, dtype=np.float64)
+    return np.array([row.get(k, default) for k in WEIGHT_KEYS], dtype=np.float64)
+
+
+def vec_to_dict(v: 'np.ndarray') -> Dict[str, float]:
+    """Unpack a length-4 weight vector into the {index: weight} dict used by callers."""
+    return {k: float(x) for k, x in zip(INDEX_KEYS, v)}
 
 class TaskLearner:
     def __init__(self, database: TaskDatabase):
@@ -12,6 +215,10 @@ class TaskLearner:
             database: TaskDatabase instance
         """
         self.db = database
+        # Initial weightages keyed on (task_id, task_name); cleared by invalidate()
+        self._compute_initial_weightages = lru_cache(maxsize=256)(self._initial_vec)
+        # get_similar_tasks results keyed on the normalized task name (LRU order)
+        self._similar_cache: OrderedDict = OrderedDict()
     
     def get_initial_weightages(self, task_id: int, task_name: str) -> Dict[str, float]:
         """
@@ -24,40 +231,70 @@ class TaskLearner:
         Uses AI-powered semantic similarity to find related tasks and transfer their
         learned weights, even when task names don't share exact words.
         """
-        index_keys = ['drowsiness', 'slouching', 'attention', 'yawn_score']
-
+        return vec_to_dict(self._compute_initial_weightages(task_id, task_name))
+    
+    def invalidate(self, task_id: Optional[int] = None):
+        """
+        Drop cached initial weightages after weightages are written to the database.
+        
+        The whole cache is cleared regardless of task_id, since semantic transfer
+        makes one task's initial weights depend on other tasks' stored weights
+        (and which tasks count as trained for get_similar_tasks).
+        """
+        self._compute_initial_weightages.cache_clear()
+        self._similar_cache.clear()
+    
+    def _get_similar_tasks(self, task_name: str) -> list:
+        """db.get_similar_tasks(task_name, limit=3), cached on the case/whitespace-normalized name."""
+        key = re.sub(r'\s+', ' ', task_name.strip().lower())
+        cached = self._similar_cache.get(key)
+        if cached is not None:
+            self._similar_cache.move_to_end(key)
+            return cached
+        similar = self.db.get_similar_tasks(task_name, limit=3)
+        self._similar_cache[key] = similar
+        if len(self._similar_cache) > SIMILAR_CACHE_SIZE:
+            self._similar_cache.popitem(last=False)
+        return similar
+    
+    def _initial_vec(self, task_id: int, task_name: str) -> 'np.ndarray':
+        """Resolve initial weightages as a (read-only) vector ordered as INDEX_KEYS."""
+        vec = self._resolve_initial_vec(task_id, task_name)
+        vec.flags.writeable = False
+        return vec
+    
+    def _resolve_initial_vec(self, task_id: int, task_name: str) -> 'np.ndarray':
+        np = _numpy()
         # 1. Direct retrieval if task already exists
         weightages = self.db.get_task_weightages(task_id)
         if weightages:
             ts = weightages.get('total_sessions', 0)
             print(f"✓ Using stored weights for '{task_name}' (sessions={ts})")
-            return {k: weightages.get(f'{k}_weight', 0.0) for k in index_keys}
+            return vec_from_db(weightages)
 
         # 2. Semantic transfer from similar tasks
-        similar_tasks = self.db.get_similar_tasks(task_name, limit=3)
+        similar_tasks = self._get_similar_tasks(task_name)
         if similar_tasks:
             print(f"✓ Found {len(similar_tasks)} similar task(s) for '{task_name}':")
             for _, similar_name, similarity in similar_tasks:
                 print(f"  - '{similar_name}' ({similarity*100:.1f}% match)")
             total_similarity = sum(sim for _, _, sim in similar_tasks)
             if total_similarity > 0:
-                sums = {k: 0.0 for k in index_keys}
-                for similar_task_id, _, similarity in similar_tasks:
-                    similar_weights = self.db.get_task_weightages(similar_task_id)
-                    if similar_weights:
-                        weight = similarity / total_similarity
-                        for k in index_keys:
-                            sums[k] += similar_weights.get(f'{k}_weight', 0.0) * weight
-                total = sum(sums.values())
-                if total > 0:
-                    transferred = {k: v / total for k, v in sums.items()}
-                    print("  → Transferred weights from similar tasks")
-                    return transferred
-
-    # 3. Equal baseline (1/4 each)
+                # One query for all similar tasks; ones without stored weights contribute nothing
+                rows = self.db.get_task_weightages_many([t[0] for t in similar_tasks])
+                found = [(rows[tid], sim) for tid, _, sim in similar_tasks if tid in rows]
+                if found:
+                    sims = np.array([sim for _, sim in found])
+                    weights_mat = np.stack([vec_from_db(row) for row, _ in found])
+                    sums = (sims / total_similarity) @ weights_mat
+                    total = sums.sum()
+                    if total > 0:
+                        print("  → Transferred weights from similar tasks")
+                        return sums / total
+
+        # 3. Equal baseline (1/4 each)
         print(f"ℹ  No stored or similar tasks for '{task_name}'. Using equal defaults.")
-        default = 1.0 / len(index_keys)
-        return {k: default for k in index_keys}
+        return np.full(len(INDEX_KEYS), DEFAULT_WEIGHT)
     
     def calculate_break_duration(self, indices: Dict[str, float], weightages: Dict[str, float], scaler: float = 300.0) -> int:
         """
@@ -78,12 +315,8 @@ class TaskLearner:
         - User drowsy after timer ends → scaler increases (longer breaks needed)
         - User alert right when timer ends → scaler unchanged (perfect timing)
         """
-        index_keys = ['drowsiness', 'slouching', 'attention', 'yawn_score']
-        # Calculate weighted tiredness score (0.0-1.0)
-        weighted_score = sum(indices.get(k, 0.0) * weightages.get(k, 0.0) for k in index_keys)
-        
         # Direct formula: duration = scaler × weighted_score
-        duration = int(scaler * weighted_score)
+        duration = int(scaler * _weighted_sum(indices, weightages))
         
         # Ensure minimum duration of 30 seconds (for very low tiredness)
         return max(30, duration)
@@ -99,8 +332,7 @@ class TaskLearner:
         Returns:
             Weighted tiredness score (0.0-1.0)
         """
-        index_keys = ['drowsiness', 'slouching', 'attention', 'yawn_score']
-        return sum(indices.get(k, 0.0) * weightages.get(k, 0.0) for k in index_keys)
+        return _weighted_sum(indices, weightages)
 
     def update_scaler(self, current_scaler: float, user_alert_before: bool, 
                       user_drowsy_after: bool, became_alert_at: Optional[float] = None, 
@@ -129,15 +361,9 @@ class TaskLearner:
             # If they became alert near the end (> 80% through), only decrease slightly
             progress_ratio = became_alert_at / break_duration
 
-            if progress_ratio < 0.3:
-                # Very early - timer way too long
-                adjustment = learning_rate * 1.5
-            elif progress_ratio < 0.6:
-                # Moderately early - timer somewhat too long
-                adjustment = learning_rate * 1.0
-            else:
-                # Near the end - timer only slightly too long
-                adjustment = learning_rate * 0.5
+            # Very early (< 30%) x1.5, moderately early (< 60%) x1.0, near the end x0.5;
+            # the comparisons are summed as 0/1 instead of branching
+            adjustment = learning_rate * (1.5 - 0.5 * (progress_ratio >= 0.3) - 0.5 * (progress_ratio >= 0.6))
 
             new_scaler = current_scaler * (1.0 - adjustment)
             print(f"User became alert at {became_alert_at:.1f}s / {break_duration}s ({progress_ratio:.1%}) - decreasing scaler by {adjustment:.2%}")
@@ -154,9 +380,9 @@ class TaskLearner:
         # Clamp scaler to reasonable range (50 to 600 seconds at max tiredness)
         return max(50.0, min(600.0, new_scaler))
     
-    def adjust_weightages(self, task_id: int, break_history: List[Dict]) -> Dict[str, float]:
+    def adjust_weightages(self, task_id: int, break_history: List[Dict]) -> 'np.ndarray':
         """
-    Adjust weightages based on user reactions to breaks for 4 indices.
+        Adjust weightages based on user reactions to breaks for 4 indices.
         
         Learning rules:
         - If user is alert before timer: reduce weight of the dominant index
@@ -168,50 +394,27 @@ class TaskLearner:
             break_history: List of break events with user reactions and all 4 indices
         
         Returns:
-            Adjusted weightages dict with all 7 keys
+            Adjusted weight vector ordered as INDEX_KEYS
         """
-        index_keys = ['drowsiness', 'slouching', 'attention', 'yawn_score']
         if not break_history:
             # No history, return current weights
-            current = self.db.get_task_weightages(task_id)
-            if current:
-                return {k: current.get(f'{k}_weight', 1.0/len(index_keys)) for k in index_keys}
-            default = 1.0 / len(index_keys)
-            return {k: default for k in index_keys}
+            return vec_from_db(self.db.get_task_weightages(task_id), DEFAULT_WEIGHT)
         # Get current weightages
-        current = self.db.get_task_weightages(task_id)
-        if not current:
-            default = 1.0 / len(index_keys)
-            weights = {k: default for k in index_keys}
-        else:
-            weights = {k: current.get(f'{k}_weight', 1.0/len(index_keys)) for k in index_keys}
-        # Analyze break history
-        total_adjustments = {k: 0.0 for k in index_keys}
-        adjustment_count = 0
-        for break_event in break_history:
-            # Determine dominant index (highest value)
-            index_values = {k: break_event.get(f'{k}_index', 0) for k in index_keys}
-            dominant = max(index_values.keys(), key=lambda k: index_values[k])
-            # Adjust based on user reaction
-            if break_event.get('alert_before'):
-                total_adjustments[dominant] -= 0.05
-                adjustment_count += 1
-            elif break_event.get('drowsy_after'):
-                total_adjustments[dominant] += 0.05
-                adjustment_count += 1
+        weights = vec_from_db(self.db.get_task_weightages(task_id), DEFAULT_WEIGHT)
+        # Analyze break history as an (N, 4) matrix of indices plus reaction masks
+        np = _numpy()
+        n = len(break_history)
+        idx_mat = np.array([_index_values(be) for be in break_history],
+                           dtype=np.float64).reshape(n, len(INDEX_KEYS))
+        alert = np.fromiter((bool(be.get('alert_before')) for be in break_history), dtype=bool, count=n)
+        drowsy = np.fromiter((bool(be.get('drowsy_after')) for be in break_history), dtype=bool, count=n)
+        total_adjustments = np.empty(len(INDEX_KEYS))
+        adjustment_count = int(_scan(idx_mat, alert, drowsy, total_adjustments))
         # Apply adjustments (averaged)
         if adjustment_count > 0:
-            for k in index_keys:
-                weights[k] += total_adjustments[k] / adjustment_count
-        # Ensure weights stay in reasonable range (0.05 to 0.50)
-        for k in index_keys:
-            weights[k] = max(0.05, min(0.50, weights[k]))
-        # Normalize to sum to 1.0
-        total = sum(weights.values())
-        if total > 0:
-            for k in index_keys:
-                weights[k] /= total
-        return weights
+            weights += total_adjustments / adjustment_count
+        # Ensure weights stay in reasonable range (0.05 to 0.50), then normalize to sum to 1.0
+        return _clip_normalize4(weights, 0.05, 0.50)
     
     def learn_from_session(self, task_id: int, break_history: List[Dict]):
         """
@@ -219,11 +422,17 @@ class TaskLearner:
         Args:
             task_id: Task ID
             break_history: List of break events from the session
+        
+        Returns:
+            New weightages dict, or None if the session had no alert/drowsy reactions
         """
         if not break_history:
             return None
+        # Nothing to learn unless at least one break recorded a user reaction
+        if not any(be.get('alert_before') or be.get('drowsy_after') for be in break_history):
+            return None
         # Adjust weightages based on session
         new_weightages = self.adjust_weightages(task_id, break_history)
         # Return new weightages to caller so caller (main) can persist them per-subject if desired
-        return new_weightages
+        return vec_to_dict(new_weightages)
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Test script to check if all required packages are installed."""
+import importlib.util
 import sys
 
 required_packages = [
@@ -12,21 +13,12 @@ required_packages = [
 
 missing = []
 for package in required_packages:
-    try:
-        if package == 'cv2':
-            import cv2
-        elif package == 'mediapipe':
-            import mediapipe
-        elif package == 'numpy':
-            import numpy
-        elif package == 'pynput':
-            import pynput
-        elif package == 'tkinter':
-            import tkinter
-        print(f"✓ {package} is installed")
-    except ImportError:
+    # find_spec only locates the package; it doesn't run its (heavy) import
+    if importlib.util.find_spec(package) is None:
         print(f"✗ {package} is NOT installed")
         missing.append(package)
+    else:
+        print(f"✓ {package} is installed")
 
 if missing:
     print(f"\nMissing packages: {', '.join(missing)}")
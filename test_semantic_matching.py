@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Test semantic task matching functionality."""
 
+import numpy as np
 from semantic_matcher import get_semantic_matcher
 
 def test_semantic_matching():
@@ -28,8 +29,19 @@ def test_semantic_matching():
         ("history research", "math homework"),  # Should be low similarity
     ]
     
+    # Embed every distinct task name in one batched API call, then score pairs locally
+    uniq = list(dict.fromkeys(s for pair in test_pairs for s in pair))
+    embs = matcher.encode_batch(uniq)
+    if embs is not None:
+        embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+        row = {s: i for i, s in enumerate(uniq)}
+    
     for task1, task2 in test_pairs:
-        similarity = matcher.compute_similarity(task1, task2)
+        if embs is not None:
+            # Cosine similarity mapped from [-1, 1] to [0, 1], as compute_similarity does
+            similarity = float((embs[row[task1]] @ embs[row[task2]] + 1) / 2)
+        else:
+            similarity = matcher.compute_similarity(task1, task2)
         match_level = "🟢 HIGH" if similarity > 0.7 else "🟡 MEDIUM" if similarity > 0.4 else "🔴 LOW"
         print(f"{match_level}  '{task1}' ↔ '{task2}'")
         print(f"        Similarity: {similarity*100:.1f}%")